@@ -0,0 +1,54 @@
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.repositories import async_route_repository as async_repo
+from app.services.cache import current_route_version
+
+# Bump when a route endpoint's response shape changes, so clients holding an
+# ETag for the old representation don't get a 304 for the new one
+REPRESENTATION_VERSION = 2
+
+
+def make_etag(path: str, version) -> str:
+    raw = repr((REPRESENTATION_VERSION, path, tuple(version)))
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+async def route_etag(
+    route_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Conditional GET for per-route endpoints. The ETag comes from a cheap
+    version query; a matching If-None-Match answers 304 before the endpoint
+    runs its queries. Returns the ETag, or None for unknown routes, which fall
+    through to the endpoint unchanged.
+    """
+    version = await async_repo.get_route_version(db, route_id)
+    if version is None:
+        return None
+
+    # Cached entries loaded under an older version are reloaded, so the body
+    # matches the tag it's sent with
+    current_route_version.set((route_id, tuple(version)))
+
+    etag = make_etag(request.url.path, version)
+    # no-cache: browsers keep the body but revalidate with If-None-Match each time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return etag
@@ -0,0 +1,49 @@
+import csv
+import io
+from enum import Enum
+from typing import List
+
+from app.api.responses import dumps
+from app.services.route_comparison import METRIC_FIELDS, comparison_metrics, comparison_payload, route_header
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+ROUTE_COLUMNS = ("route_id", "station_code", "date_YYYY_MM_DD", "departure_time_utc", "executor_capacity_cm3", "route_score")
+
+# Sequences are flattened to space-separated stop codes in visiting order;
+# coordinates are left to the NDJSON format
+CSV_COLUMNS = (*ROUTE_COLUMNS, "planned_stop_codes", "actual_stop_codes", *METRIC_FIELDS)
+
+
+def ndjson_chunk(comparisons: List[dict]) -> bytes:
+    return b"".join(dumps(comparison_payload(comparison)) + b"\n" for comparison in comparisons)
+
+
+def csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue().encode("utf-8")
+
+
+def csv_chunk(comparisons: List[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for comparison in comparisons:
+        header = route_header(comparison["route"])
+        metrics = comparison_metrics(comparison)
+        writer.writerow((
+            *(header[column] for column in ROUTE_COLUMNS),
+            " ".join(comparison["planned"]["stop_code"]),
+            " ".join(comparison["actual"]["stop_code"]),
+            *(metrics[field] for field in METRIC_FIELDS),
+        ))
+    return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,52 @@
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.request_metrics import end_request, request_metrics, start_request
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware, so streaming responses and
+    context variables pass through untouched) that times each request until
+    its last body chunk is sent and records it under the route template, e.g.
+    /api/v1/routes/{route_id}/comparison, rather than the raw path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        finished = None
+        stats, token = start_request()
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request(token)
+            duration = (finished or time.perf_counter()) - started
+            request_metrics.observe(scope["method"], route_template(scope), status, duration, stats)
+
+
+def route_template(scope: Scope) -> str:
+    # Unmatched paths share one label so 404 scans can't blow up cardinality
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
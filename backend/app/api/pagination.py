@@ -0,0 +1,27 @@
+import base64
+import json
+from datetime import date
+
+from fastapi import HTTPException
+
+# Cursors are opaque to clients: base64url-encoded JSON of the last row's sort
+# key. Routes without a date sort last and encode their date as null.
+
+
+def encode_cursor(key: tuple[date | None, str] | None) -> str | None:
+    if key is None:
+        return None
+    day = None if key[0] is None else key[0].isoformat()
+    raw = json.dumps([day, key[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[date | None, str] | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        day, route_id = json.loads(raw)
+        return (None if day is None else date.fromisoformat(day)), str(route_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,50 @@
+import time
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.core.request_metrics import record_serialization
+
+
+def _default(value):
+    # orjson handles dates, times and numpy arrays natively; Numeric columns
+    # arrive as Decimal and are served as floats, as the Pydantic schemas do
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    started = time.perf_counter()
+    body = orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+    record_serialization(time.perf_counter() - started)
+    return body
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson. Returning one from an endpoint skips
+    FastAPI's response_model validation and jsonable_encoder pass, so use it
+    for payloads the repository already builds in the documented shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content: Any, response: Response | None = None) -> FastJSONResponse:
+    # Headers set on the injected Response (ETag, X-Next-Cursor) only apply to
+    # returned dicts, so carry them over to the response we build ourselves
+    result = FastJSONResponse(content)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != "content-length":
+                result.headers[name] = value
+    return result
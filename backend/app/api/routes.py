@@ -1,75 +1,252 @@
-from typing import List
-from fastapi import Query
-from app.db.session import get_db
+import hashlib
+from datetime import date
+from typing import Awaitable, Callable, List, Optional
+from fastapi import Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.api.etag import route_etag
+from app.api.export import MEDIA_TYPES, ExportFormat, csv_chunk, csv_header, ndjson_chunk
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.responses import fast_json
+from app.core.request_metrics import planner_cpu
+from app.db.session import AsyncSessionLocal, get_async_db, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException
 from app.repositories.route_repository import (
-    get_all_routes,
-    get_all_routes_paginated,
+    get_compact_route,
     get_route,
-    get_route_stops,
-    get_actual_route_sequence,
-    get_actual_route,
-    get_route_with_stops,
+    get_route_stops_bulk,
+    refresh_route_metrics,
     save_planned_route,
-    get_planned_route,
-    save_route_metrics,
-    get_route_metric,
-    get_total_routes_total_stops
+    save_planned_routes,
 )
+from app.repositories import async_route_repository as async_repo
 from app.schemas.stop import StopResponse
 from app.schemas.route import RouteResponse, RouteResponseWithStopsCount,RouteResponseWithRouteAndStopCount
 from app.schemas.actual_route import ActualStopResponse
-from app.schemas.planned_route import PlannedRouteResponse
-from app.services.router_planner import RoutePlanner
-from app.schemas.route_metric import RouteMetricBase,RouteMetricRepsonse
+from app.schemas.planned_route import BatchPlanRequest, BatchPlanResponse, PlannedRouteResponse
+from app.services.batch_planner import plan_routes
+from app.snapshot.parquet import MEDIA_TYPE as SNAPSHOT_MEDIA_TYPE
+from app.snapshot.parquet import ROW_GROUP_ROWS, ParquetChunks, SnapshotTable, snapshot_filename, snapshot_stmt
+from app.services.route_comparison import comparison_payload
+from app.services.router_planner import PlannerMode, RoutePlanner
+from app.services.shared_cache import shared_cache
+from app.schemas.route_metric import AnalyticsGroupBy, RouteAnalyticsResponse, RouteMetricBase,RouteMetricRepsonse
 
 router = APIRouter(prefix="/routes", tags=["Routes"])
 
+
+def comparison_cache_key(route_id: str, etag: str | None) -> str:
+    # Keyed by the route's ETag, so a write anywhere (this worker, another
+    # worker, the ingest CLI) moves readers to a fresh entry; old entries
+    # just expire
+    return f"comparison:{route_id}:{etag}"
+
+
+async def versioned_cache_key(key: str, load_version: Callable[[], Awaitable[tuple]]) -> str:
+    # Listings and analytics span many routes, so they are keyed by a data
+    # version read from the database instead (see get_listing_version): any
+    # write, from any process, moves readers to a fresh entry. Skipped when
+    # nothing is cached.
+    if not shared_cache.enabled:
+        return key
+    digest = hashlib.blake2b(repr(await load_version()).encode(), digest_size=8).hexdigest()
+    return f"{key}:{digest}"
+
+
 @router.get("/all", response_model=List[RouteResponseWithStopsCount])
-def fetch_routes(db: Session = Depends(get_db)):
-    return get_all_routes(db)
+async def fetch_routes(db: AsyncSession = Depends(get_async_db)):
+    # Rows come from route_summary already in the response shape: serialize
+    # them directly instead of re-validating every row through response_model
+    key = await versioned_cache_key("routes:all", lambda: async_repo.get_listing_version(db))
+    return fast_json(await shared_cache.get_or_compute(key, lambda: async_repo.get_all_routes(db)))
 
 @router.get("/total_routes_and_stops", response_model=RouteResponseWithRouteAndStopCount)
-def fetch_routes(db: Session = Depends(get_db)):
-    return get_total_routes_total_stops(db)
+async def fetch_routes(db: AsyncSession = Depends(get_async_db)):
+    key = await versioned_cache_key("routes:totals", lambda: async_repo.get_listing_version(db))
+    return await shared_cache.get_or_compute(key, lambda: async_repo.get_total_routes_total_stops(db))
    
 @router.get("", response_model=List[RouteResponseWithStopsCount])
-def fetch_routes(
-    skip: int = Query(0, ge=0),      
-    limit: int = Query(10, ge=1, le=100), 
+async def fetch_routes(
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    station_code: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after = decode_cursor(cursor)
+
+    async def load_page():
+        routes, next_key = await async_repo.get_all_routes_paginated(
+            db,
+            limit=limit,
+            after=after,
+            station_code=station_code,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        return {"routes": routes, "next_cursor": encode_cursor(next_key)}
+
+    key = await versioned_cache_key(
+        f"routes:page:{limit}:{cursor}:{station_code}:{date_from}:{date_to}",
+        lambda: async_repo.get_listing_version(db),
+    )
+    page = await shared_cache.get_or_compute(key, load_page)
+
+    # Pass back as ?cursor= for the next page; absent on the last page
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+
+    return fast_json(page["routes"], response)
+
+@router.get("/analytics", response_model=RouteAnalyticsResponse)
+async def fetch_route_analytics(
+    group_by: AnalyticsGroupBy = Query(AnalyticsGroupBy.STATION_CODE),
+    station_code: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Distributions over the stored route_metrics rows, aggregated in Postgres
+    key = await versioned_cache_key(
+        f"routes:analytics:{group_by.value}:{station_code}:{date_from}:{date_to}",
+        lambda: async_repo.get_analytics_version(db),
+    )
+    groups = await shared_cache.get_or_compute(
+        key,
+        lambda: async_repo.get_route_metric_analytics(
+            db,
+            group_by.value,
+            station_code=station_code,
+            date_from=date_from,
+            date_to=date_to,
+        ),
+    )
+    return fast_json({"group_by": group_by.value, "groups": groups})
+
+@router.get("/export")
+async def export_routes(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    station_code: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+):
+    # One line per route with both sequences and its metrics, streamed from a
+    # server-side cursor. The session is opened by the generator itself so it
+    # lives exactly as long as the stream.
+    async def lines():
+        if format == ExportFormat.CSV:
+            yield csv_header()
+        async with AsyncSessionLocal() as db:
+            async for comparisons in async_repo.stream_routes_with_sequences(
+                db, station_code=station_code, date_from=date_from, date_to=date_to
+            ):
+                yield csv_chunk(comparisons) if format == ExportFormat.CSV else ndjson_chunk(comparisons)
+
+    return StreamingResponse(
+        lines(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="routes.{format.value}"'},
+    )
+
+@router.get("/snapshot")
+async def export_snapshot(
+    table: SnapshotTable = Query(SnapshotTable.STOPS),
+    station_code: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+):
+    # Parquet file built one row group at a time from a server-side cursor
+    try:
+        writer = ParquetChunks(table)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+
+    async def chunks():
+        async with AsyncSessionLocal() as db:
+            async for rows in async_repo.stream_rows(
+                db, snapshot_stmt(table, station_code, date_from, date_to), ROW_GROUP_ROWS
+            ):
+                # Encoding a row group is CPU-bound: keep it off the event loop
+                yield await run_in_threadpool(writer.write, rows)
+        yield await run_in_threadpool(writer.close)
+
+    filename = snapshot_filename(table, date_from, date_to)
+    return StreamingResponse(
+        chunks(),
+        media_type=SNAPSHOT_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/generate/planned_routes:batch", response_model=BatchPlanResponse)
+def generate_planned_routes_batch(
+    request: BatchPlanRequest,
+    mode: PlannerMode = Query(PlannerMode.MATRIX),
+    improve_ms: int = Query(0, ge=0, le=10000),
     db: Session = Depends(get_db)
 ):
-    return get_all_routes_paginated(db, skip=skip, limit=limit)
+    stops_by_route = get_route_stops_bulk(
+        db,
+        route_ids=request.route_ids,
+        station_code=request.station_code,
+        date_YYYY_MM_DD=request.date_YYYY_MM_DD,
+    )
+    if not stops_by_route:
+        raise HTTPException(status_code=404, detail="No stops found for the given routes")
 
-@router.get("/{route_id}", response_model=RouteResponse)
-def fetch_route(route_id: str, db: Session = Depends(get_db)):
-    route = get_route(db, route_id)
+    planned_routes, failed_routes = plan_routes(stops_by_route, mode=mode, improve_ms=improve_ms)
+
+    for route_id in request.route_ids or []:
+        if route_id not in stops_by_route:
+            failed_routes[route_id] = "No stops found for the given route"
+
+    save_planned_routes(db, planned_routes)
+    refresh_route_metrics(db, list(planned_routes))
+
+    return {
+        "planned_route_count": len(planned_routes),
+        "planned_stop_count": sum(len(sequence) for sequence in planned_routes.values()),
+        "failed_routes": failed_routes,
+    }
+
+@router.get("/{route_id}", response_model=RouteResponse, dependencies=[Depends(route_etag)])
+async def fetch_route(route_id: str, db: AsyncSession = Depends(get_async_db)):
+    route = await async_repo.get_route(db, route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
     return route
 
-@router.get("/{route_id}/stops", response_model=List[StopResponse])
-def fetch_route_stops(route_id: str, db: Session = Depends(get_db)):
-    return get_route_stops(db, route_id)
+@router.get("/{route_id}/stops", response_model=List[StopResponse], dependencies=[Depends(route_etag)])
+async def fetch_route_stops(route_id: str, db: AsyncSession = Depends(get_async_db)):
+    return await async_repo.get_route_stops(db, route_id)
 
-@router.get("/{route_id}/actual", response_model=List[ActualStopResponse])
-def fetch_actual_route(route_id: str, db: Session = Depends(get_db)):
-    return get_actual_route_sequence(db, route_id)
+@router.get("/{route_id}/actual", response_model=List[ActualStopResponse], dependencies=[Depends(route_etag)])
+async def fetch_actual_route(route_id: str, db: AsyncSession = Depends(get_async_db)):
+    return await async_repo.get_actual_route_sequence(db, route_id)
 
 @router.post("/{route_id}/generate/planned_routes", response_model=PlannedRouteResponse)
-def generate_planned_routes(route_id: str, db: Session = Depends(get_db)):
+def generate_planned_routes(
+    route_id: str,
+    mode: PlannerMode = Query(PlannerMode.MATRIX),
+    improve_ms: int = Query(0, ge=0, le=10000),
+    db: Session = Depends(get_db)
+):
     route = get_route(db, route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
-    stops = get_route_stops(db, route_id)
+    stops = get_compact_route(db, route_id)
     if not stops:
         raise HTTPException(status_code=404, detail="No stops found for the given route")
     
-    planner = RoutePlanner(route, stops)
-    planned_route = planner.generate_planned_route()
+    planner = RoutePlanner(route, stops, mode=mode)
+    with planner_cpu():
+        planned_route = planner.generate_planned_route(improve_ms=improve_ms)
 
     save_planned_route(db, route_id, planned_route)
+    refresh_route_metrics(db, [route_id])
 
     return {
         "route": route,
@@ -77,56 +254,47 @@ def generate_planned_routes(route_id: str, db: Session = Depends(get_db)):
     }
 
 @router.get("/{route_id}/comparison")
-def get_route_comparison(route_id: str, db: Session = Depends(get_db)):
+async def get_route_comparison(
+    route_id: str,
+    response: Response,
+    etag: str | None = Depends(route_etag),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Read-only: metrics are written by planning and /metrics/recompute
+    async def load_comparison():
+        comparison = await async_repo.get_route_with_sequences(db, route_id)
+        if not comparison:
+            raise HTTPException(status_code=404, detail="Route not found")
+
+        return comparison_payload(comparison)
+
+    return fast_json(await shared_cache.get_or_compute(comparison_cache_key(route_id, etag), load_comparison), response)
+
+
+@router.post("/{route_id}/metrics/recompute", response_model=RouteMetricRepsonse)
+def recompute_route_metric(route_id: str, db: Session = Depends(get_db)):
     route = get_route(db, route_id)
     if not route:
         raise HTTPException(status_code=404, detail="Route not found")
 
-    planned_route = get_planned_route(db, route_id)
-    actual_route = get_actual_route(db, route_id)
-
-    planned_km = RoutePlanner.total_route_distance(planned_route)
-    actual_km = RoutePlanner.total_route_distance(actual_route)
-    order_matches, order_match_percentage = RoutePlanner.order_match_percentage(planned_route, actual_route)
-    prefix_matches = RoutePlanner.prefix_match_count(planned_route, actual_route)
-
-    metric = {
-        "total_planned_distance_km": planned_km,
-        "total_actual_distance_km": actual_km,
-        "distance_delta_km": round(planned_km - actual_km if planned_km is not None and actual_km is not None else 0, 2),
-        "distance_delta_percent": round(((planned_km - actual_km) / actual_km * 100) if actual_km and actual_km != 0 else 0,2),
-        "order_matched_stops": order_matches,
-        "order_match_percentage": order_match_percentage,
-        "prefix_match_count": prefix_matches,
-        "total_stops": len(planned_route),
-    }
-
-    save_route_metrics(db, route_id, metric)
+    metric = refresh_route_metrics(db, [route_id])[route_id]
 
     return {
-        "route": {
-            "route_id": route.route_id,
-            "station_code": route.station_code,
-            "date_YYYY_MM_DD": route.date_YYYY_MM_DD,
-            "departure_time_utc": route.departure_time_utc,
-            "executor_capacity_cm3": float(route.executor_capacity_cm3),
-            "route_score": route.route_score,
-        },
-        "planned_route": planned_route,
-        "actual_route": actual_route,
+        "route": route,
+        "metrics": {"route_id": route_id, **metric}
     }
 
 
-@router.get("/{route_id}/metrics", response_model=RouteMetricRepsonse)
-def fetch_route_metric(route_id: str, db: Session = Depends(get_db)):
-    route = get_route(db, route_id)
+@router.get("/{route_id}/metrics", response_model=RouteMetricRepsonse, dependencies=[Depends(route_etag)])
+async def fetch_route_metric(route_id: str, db: AsyncSession = Depends(get_async_db)):
+    route = await async_repo.get_route(db, route_id)
     if not route:
         raise HTTPException(
             status_code=404,
             detail="Route not found"
         )
     
-    metric = get_route_metric(db, route_id)
+    metric = await async_repo.get_route_metric(db, route_id)
 
     if not metric:
         raise HTTPException(
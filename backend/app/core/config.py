@@ -18,6 +18,26 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str
 
+    # Connection pool (sized per engine: the sync and async engines each get one)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+
+    # In-process read cache (entries per entity cache, TTLs in seconds)
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_ROUTE_TTL: float = 3600
+    CACHE_DERIVED_TTL: float = 600
+    CACHE_ACTUAL_TTL: float = 60
+
+    # Shared cache for comparison payloads and listings: "none", "memory"
+    # (in-process stand-in) or "redis" (shared by all workers)
+    CACHE_BACKEND: str = "none"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    SHARED_CACHE_TTL: float = 60
+    SHARED_CACHE_LOCK_MS: int = 5000
+
     @property
     def DATABASE_URL(self) -> str:
         return (
@@ -26,6 +46,14 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:"
+            f"{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:"
+            f"{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        )
+
     class Config:
         env_file = ".env"
         case_sensitive = True
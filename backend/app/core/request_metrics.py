@@ -0,0 +1,128 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.core.metrics import LATENCY_BUCKETS, Histogram
+
+# Buckets for the number of SQL statements one request runs
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class RequestStats:
+    """Per-request accumulators, filled in by the DB hooks, the JSON renderer and the planner."""
+
+    __slots__ = ("db_queries", "db_seconds", "serialize_seconds", "planner_cpu_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.planner_cpu_seconds = 0.0
+
+
+# Set by the middleware for the duration of a request. Sync endpoints run in
+# the threadpool with a copy of the context, which still points at the same
+# RequestStats object, so their updates land in the request's totals.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def start_request() -> Tuple[RequestStats, object]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def record_query(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+
+def record_serialization(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.serialize_seconds += seconds
+
+
+def record_planner_cpu(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.planner_cpu_seconds += seconds
+
+
+@contextmanager
+def planner_cpu():
+    # CPU time of planning done on the request's own thread
+    started = time.thread_time()
+    try:
+        yield
+    finally:
+        record_planner_cpu(time.thread_time() - started)
+
+
+# (metric name, help text, bucket bounds, RequestStats attribute or None for latency)
+HISTOGRAMS = (
+    ("http_request_duration_seconds", "Request latency, first byte received to last byte sent.", LATENCY_BUCKETS, None),
+    ("http_request_db_seconds", "Time spent executing SQL per request.", LATENCY_BUCKETS, "db_seconds"),
+    ("http_request_db_queries", "SQL statements executed per request.", QUERY_COUNT_BUCKETS, "db_queries"),
+    ("http_request_serialize_seconds", "Time spent rendering JSON per request.", LATENCY_BUCKETS, "serialize_seconds"),
+    ("http_request_planner_cpu_seconds", "Route planner CPU time per request, worker processes included.", LATENCY_BUCKETS, "planner_cpu_seconds"),
+)
+
+
+class RequestMetrics:
+    """Histograms per (method, route template) plus request counts by status."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], List[Histogram]] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, duration: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = [Histogram(buckets) for _, _, buckets, _ in HISTOGRAMS]
+            self._responses[(method, route, status)] = self._responses.get((method, route, status), 0) + 1
+
+        for histogram, (_, _, _, attribute) in zip(histograms, HISTOGRAMS):
+            histogram.observe(duration if attribute is None else getattr(stats, attribute))
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            histograms = dict(self._histograms)
+            responses = dict(self._responses)
+
+        lines = [
+            "# HELP http_requests_total Requests by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(responses.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        for index, (name, help_text, _, _) in enumerate(HISTOGRAMS):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), series in sorted(histograms.items()):
+                labels = f'method="{method}",route="{_escape(route)}"'
+                snapshot = series[index].snapshot()
+                for bound, count in snapshot["buckets"].items():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {snapshot['sum']}")
+                lines.append(f"{name}_count{{{labels}}} {snapshot['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
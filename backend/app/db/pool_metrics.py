@@ -0,0 +1,78 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+from app.core.metrics import Histogram
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_seconds = Histogram()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.pool: Pool | None = None
+        self._lock = threading.Lock()
+
+    def record_checkout(self, waited: float, overflowed: bool) -> None:
+        self.wait_seconds.observe(waited)
+        with self._lock:
+            self.checkouts += 1
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self, waited: float) -> None:
+        self.wait_seconds.observe(waited)
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        return {
+            "pool_size": pool.size() if pool else 0,
+            "checked_out": pool.checkedout() if pool else 0,
+            "checked_in": pool.checkedin() if pool else 0,
+            "overflow": max(pool.overflow(), 0) if pool else 0,
+            "checkouts_total": self.checkouts,
+            "overflow_events_total": self.overflow_events,
+            "timeouts_total": self.timeouts,
+            "wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+
+class InstrumentedPoolMixin:
+    # Times QueuePool._do_get, which is where a checkout blocks when the pool
+    # is exhausted; that wait is invisible to the public pool events
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # engine.dispose() builds a replacement pool of the same class
+        self.metrics.pool = self
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            raise
+
+        overflow_after = self.overflow()
+        self.metrics.record_checkout(
+            time.perf_counter() - start,
+            overflowed=overflow_after > overflow_before and overflow_after > 0,
+        )
+        return connection
+
+
+def instrumented_pool_class(pool_class: type, metrics: PoolMetrics) -> type:
+    return type(
+        f"Instrumented{pool_class.__name__}",
+        (InstrumentedPoolMixin, pool_class),
+        {"metrics": metrics},
+    )
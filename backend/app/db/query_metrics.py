@@ -0,0 +1,24 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.request_metrics import record_query
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is not None:
+        record_query(time.perf_counter() - started)
+
+
+def install_query_hooks() -> None:
+    # Listening on the Engine class covers the sync engine and the async
+    # engine, whose statements run through its sync_engine
+    if not event.contains(Engine, "before_cursor_execute", _start_query):
+        event.listen(Engine, "before_cursor_execute", _start_query)
+        event.listen(Engine, "after_cursor_execute", _finish_query)
@@ -0,0 +1,75 @@
+"""
+Bulk-load route data and actual sequences with COPY + set-based upserts.
+
+Usage (from backend/):
+    python -m app.ingest --routes route_data.json --actual actual_sequences.json
+    python -m app.ingest --dir exports/ --workers 8 --precompute
+"""
+import argparse
+import os
+import sys
+
+import psycopg2
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.ingest.copy_loader import connect, load_actual_sequences, load_routes
+from app.ingest.precompute import precompute_routes, session_factory
+from app.ingest.runner import ACTUAL_FILES, ROUTE_FILES, ingest_directory
+from app.ingest.sources import read_route_objects
+from app.services.router_planner import PlannerMode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", help="route_data.json (route metadata and stops)")
+    parser.add_argument("--actual", help="actual_sequences.json (loaded after --routes)")
+    parser.add_argument("--dir", help=f"directory of {ROUTE_FILES} and {ACTUAL_FILES} files, loaded in parallel with checkpoints")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes/connections for --dir")
+    parser.add_argument("--batch-size", type=int, default=1000, help="routes per transaction")
+    parser.add_argument("--precompute", action="store_true", help="after loading, plan new routes and store metrics for every stale route")
+    parser.add_argument("--planner-mode", choices=[mode.value for mode in PlannerMode], default=PlannerMode.MATRIX.value)
+    parser.add_argument("--improve-ms", type=int, default=0, help="2-opt time budget per route for --precompute")
+    parser.add_argument("--dsn", help="libpq connection string; defaults to the POSTGRES_* settings")
+    args = parser.parse_args()
+
+    if args.dir and (args.routes or args.actual):
+        parser.error("--dir can't be combined with --routes/--actual")
+    if not (args.dir or args.routes or args.actual or args.precompute):
+        parser.error("nothing to do: pass --dir, --routes and/or --actual, or --precompute")
+
+    try:
+        if args.dir:
+            for report in ingest_directory(args.dir, max(1, args.workers), args.batch_size, args.dsn):
+                print(f"✅ {report}")
+        elif args.routes or args.actual:
+            load_files(args)
+
+        if args.precompute:
+            print("🧮 Planning routes and computing metrics")
+            db = session_factory(args.dsn)()
+            try:
+                print(f"✅ {precompute_routes(db, PlannerMode(args.planner_mode), args.improve_ms, args.batch_size)}")
+            finally:
+                db.close()
+    except (OSError, ValueError, psycopg2.Error, SQLAlchemyError) as exc:
+        print(f"❌ Ingest failed: {exc}")
+        sys.exit(1)
+
+
+def load_files(args):
+    conn = connect(args.dsn)
+    try:
+        if args.routes:
+            print(f"📂 Loading {args.routes}")
+            print(f"✅ {load_routes(conn, read_route_objects(args.routes), args.batch_size)}")
+        if args.actual:
+            print(f"📂 Loading {args.actual}")
+            print(f"✅ {load_actual_sequences(conn, read_route_objects(args.actual), args.batch_size)}")
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
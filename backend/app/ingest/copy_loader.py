@@ -0,0 +1,310 @@
+import io
+import re
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import psycopg2
+
+from app.core.config import settings
+
+# Rows are streamed into per-connection temp tables with COPY FROM STDIN, then
+# merged into the live tables with one set-based upsert per table. Staging
+# rows are cleared on every commit, so each batch starts empty.
+STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS stage_routes (
+    position BIGINT,
+    route_id VARCHAR(50),
+    station_code VARCHAR(10),
+    date_YYYY_MM_DD DATE,
+    departure_time_utc TIME,
+    executor_capacity_cm3 NUMERIC(10, 2),
+    route_score VARCHAR(10)
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS stage_stops (
+    position BIGINT,
+    route_id VARCHAR(50),
+    stop_code VARCHAR(10),
+    lat NUMERIC(9, 6),
+    lng NUMERIC(9, 6),
+    type VARCHAR(20),
+    zone_id VARCHAR(20)
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS stage_actual (
+    position BIGINT,
+    route_id VARCHAR(50),
+    stop_code VARCHAR(10),
+    actual_sequence INTEGER
+) ON COMMIT DELETE ROWS;
+"""
+
+# Duplicate keys within a batch keep the last occurrence (highest staging
+# position); unchanged rows are not rewritten
+MERGE_ROUTES = """
+INSERT INTO routes (
+    route_id, station_code, date_YYYY_MM_DD, departure_time_utc,
+    executor_capacity_cm3, route_score
+)
+SELECT DISTINCT ON (route_id)
+    route_id, station_code, date_YYYY_MM_DD, departure_time_utc,
+    executor_capacity_cm3, route_score
+FROM stage_routes
+ORDER BY route_id, position DESC
+ON CONFLICT (route_id) DO UPDATE SET
+    station_code = EXCLUDED.station_code,
+    date_YYYY_MM_DD = EXCLUDED.date_YYYY_MM_DD,
+    departure_time_utc = EXCLUDED.departure_time_utc,
+    executor_capacity_cm3 = EXCLUDED.executor_capacity_cm3,
+    route_score = EXCLUDED.route_score
+WHERE (
+    routes.station_code, routes.date_YYYY_MM_DD, routes.departure_time_utc,
+    routes.executor_capacity_cm3, routes.route_score
+) IS DISTINCT FROM (
+    EXCLUDED.station_code, EXCLUDED.date_YYYY_MM_DD, EXCLUDED.departure_time_utc,
+    EXCLUDED.executor_capacity_cm3, EXCLUDED.route_score
+)
+"""
+
+# Inserted in file order so stop_id keeps the order stops were listed in
+MERGE_STOPS = """
+INSERT INTO stops (route_id, stop_code, lat, lng, type, zone_id)
+SELECT route_id, stop_code, lat, lng, type, zone_id
+FROM (
+    SELECT DISTINCT ON (route_id, stop_code) *
+    FROM stage_stops
+    ORDER BY route_id, stop_code, position DESC
+) latest
+ORDER BY position
+ON CONFLICT (route_id, stop_code) DO UPDATE SET
+    lat = EXCLUDED.lat,
+    lng = EXCLUDED.lng,
+    type = EXCLUDED.type,
+    zone_id = EXCLUDED.zone_id
+WHERE (stops.lat, stops.lng, stops.type, stops.zone_id)
+    IS DISTINCT FROM (EXCLUDED.lat, EXCLUDED.lng, EXCLUDED.type, EXCLUDED.zone_id)
+"""
+
+# Sequences for routes that were never loaded are skipped (and counted); a
+# stop repeated within a batch keeps its last sequence
+MERGE_ACTUAL = """
+INSERT INTO actual_route_sequence (route_id, stop_code, actual_sequence)
+SELECT DISTINCT ON (a.route_id, a.stop_code) a.route_id, a.stop_code, a.actual_sequence
+FROM stage_actual a
+JOIN routes r ON r.route_id = a.route_id
+ORDER BY a.route_id, a.stop_code, a.position DESC
+ON CONFLICT (route_id, stop_code) DO UPDATE SET
+    actual_sequence = EXCLUDED.actual_sequence,
+    recorded_at = CURRENT_TIMESTAMP
+WHERE actual_route_sequence.actual_sequence IS DISTINCT FROM EXCLUDED.actual_sequence
+"""
+
+UNKNOWN_ACTUAL_ROUTES = """
+SELECT DISTINCT a.route_id
+FROM stage_actual a
+WHERE NOT EXISTS (SELECT 1 FROM routes r WHERE r.route_id = a.route_id)
+"""
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_SPECIAL = re.compile(r"[\\\t\n\r]")
+
+
+def copy_value(value) -> str:
+    # COPY text format: tab-separated, \N for NULL, backslash escapes. Only
+    # strings can contain the escaped characters; the check is cheaper than
+    # translating every field.
+    if value is None:
+        return "\\N"
+    if value.__class__ is str:
+        return value.translate(_COPY_ESCAPES) if _COPY_SPECIAL.search(value) else value
+    return str(value)
+
+
+class CopyRows(io.RawIOBase):
+    """Readable byte stream of COPY text lines, pulled lazily from an iterable of row tuples."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._lines = ("\t".join(map(copy_value, row)) + "\n" for row in rows)
+        self._buffer = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self._buffer) < len(b):
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer.extend(line.encode("utf-8"))
+
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+
+def copy_rows(cur, table: str, columns: Tuple[str, ...], rows: Iterable[tuple]) -> None:
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", CopyRows(rows))
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class IngestReport:
+    def __init__(self, label: str):
+        self.label = label
+        self.routes = 0
+        self.rows = 0
+        self.written = 0
+        self.skipped_routes: List[str] = []
+        self.checkpointed_batches = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, other: "IngestReport") -> None:
+        self.routes += other.routes
+        self.rows += other.rows
+        self.written += other.written
+        self.skipped_routes.extend(other.skipped_routes)
+        self.checkpointed_batches += other.checkpointed_batches
+
+    def finish(self) -> "IngestReport":
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        text = (
+            f"{self.label}: {self.routes} routes, {self.rows} rows staged, "
+            f"{self.written} inserted/updated in {self.elapsed:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/s)"
+        )
+        if self.skipped_routes:
+            text += f", {len(self.skipped_routes)} routes skipped (not in routes table)"
+        if self.checkpointed_batches:
+            text += f", {self.checkpointed_batches} batches already loaded"
+        return text
+
+
+def connect(dsn: Optional[str] = None):
+    if dsn:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        dbname=settings.POSTGRES_DB,
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+    )
+
+
+def prepare_staging(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(STAGING_DDL)
+    conn.commit()
+
+
+def route_row(route_id: str, info: dict) -> tuple:
+    return (
+        route_id,
+        info.get("station_code"),
+        info.get("date_YYYY_MM_DD"),
+        info.get("departure_time_utc"),
+        info.get("executor_capacity_cm3"),
+        info.get("route_score"),
+    )
+
+
+def stop_rows(route_id: str, info: dict) -> Iterator[tuple]:
+    for stop_code, stop in (info.get("stops") or {}).items():
+        yield route_id, stop_code, stop.get("lat"), stop.get("lng"), stop.get("type"), stop.get("zone_id")
+
+
+def merge_route_batch(cur, batch: List[Tuple[str, dict]]) -> Tuple[int, int]:
+    """Stage and merge one batch of routes and stops; returns (rows staged, rows written)."""
+    stops = [
+        (position, *row)
+        for position, row in enumerate(
+            row for route_id, info in batch for row in stop_rows(route_id, info)
+        )
+    ]
+
+    copy_rows(cur, "stage_routes", (
+        "position", "route_id", "station_code", "date_YYYY_MM_DD", "departure_time_utc",
+        "executor_capacity_cm3", "route_score",
+    ), ((position, *route_row(route_id, info)) for position, (route_id, info) in enumerate(batch)))
+    copy_rows(cur, "stage_stops", (
+        "position", "route_id", "stop_code", "lat", "lng", "type", "zone_id",
+    ), stops)
+
+    cur.execute(MERGE_ROUTES)
+    written = cur.rowcount
+    cur.execute(MERGE_STOPS)
+    written += cur.rowcount
+
+    # Keep the listing summary in step with the new stops
+    cur.execute("SELECT refresh_route_summary(%s::varchar[])", ([route_id for route_id, _ in batch],))
+    return len(batch) + len(stops), written
+
+
+def load_routes(conn, routes: Iterable[Tuple[str, dict]], batch_size: int = 1000) -> IngestReport:
+    """Load routes and their stops, one transaction per batch of routes."""
+    report = IngestReport("routes")
+    prepare_staging(conn)
+
+    for batch in batched(routes, batch_size):
+        with conn.cursor() as cur:
+            rows, written = merge_route_batch(cur, batch)
+        conn.commit()
+
+        report.routes += len(batch)
+        report.rows += rows
+        report.written += written
+
+    return report.finish()
+
+
+def actual_rows(route_id: str, info: dict) -> Iterator[tuple]:
+    for stop_code, sequence in (info.get("actual") or {}).items():
+        yield route_id, stop_code, sequence
+
+
+def merge_actual_batch(cur, batch: List[Tuple[str, dict]]) -> Tuple[int, int, List[str]]:
+    """Stage and merge one batch of actual sequences; returns (rows staged, rows written, unknown routes)."""
+    rows = [
+        (position, *row)
+        for position, row in enumerate(
+            row for route_id, info in batch for row in actual_rows(route_id, info)
+        )
+    ]
+
+    copy_rows(cur, "stage_actual", ("position", "route_id", "stop_code", "actual_sequence"), rows)
+    cur.execute(UNKNOWN_ACTUAL_ROUTES)
+    unknown = [route_id for (route_id,) in cur.fetchall()]
+    cur.execute(MERGE_ACTUAL)
+    return len(rows), cur.rowcount, unknown
+
+
+def load_actual_sequences(conn, routes: Iterable[Tuple[str, dict]], batch_size: int = 1000) -> IngestReport:
+    """Load actual stop sequences for routes already in the database."""
+    report = IngestReport("actual sequences")
+    prepare_staging(conn)
+
+    for batch in batched(routes, batch_size):
+        with conn.cursor() as cur:
+            rows, written, unknown = merge_actual_batch(cur, batch)
+        conn.commit()
+
+        report.routes += len(batch)
+        report.rows += rows
+        report.written += written
+        report.skipped_routes.extend(unknown)
+
+    return report.finish()
@@ -0,0 +1,84 @@
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db.session import SessionLocal
+from app.ingest.copy_loader import batched, connect
+from app.repositories.route_repository import (
+    get_route_stops_bulk,
+    get_routes_pending_precompute,
+    refresh_route_metrics,
+    save_planned_routes,
+)
+from app.services.batch_planner import plan_routes, shutdown_executor
+from app.services.router_planner import PlannerMode
+
+
+class PrecomputeReport:
+    def __init__(self):
+        self.routes = 0
+        self.planned = 0
+        self.metrics = 0
+        self.failed: Dict[str, str] = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self) -> "PrecomputeReport":
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def __str__(self) -> str:
+        text = (
+            f"precompute: {self.routes} routes pending, {self.planned} planned, "
+            f"{self.metrics} metrics stored in {self.elapsed:.2f}s"
+        )
+        if self.failed:
+            text += f", {len(self.failed)} routes could not be planned"
+        return text
+
+
+def session_factory(dsn: Optional[str] = None) -> sessionmaker:
+    if dsn is None:
+        return SessionLocal
+    # Same libpq connection string as the COPY loaders
+    engine = create_engine("postgresql+psycopg2://", creator=lambda: connect(dsn), poolclass=NullPool)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def precompute_routes(
+    db: Session,
+    mode: PlannerMode = PlannerMode.MATRIX,
+    improve_ms: int = 0,
+    batch_size: int = 1000,
+) -> PrecomputeReport:
+    """
+    Plan every route that has no planned sequence and store metrics for every
+    route whose metrics are missing or stale, so the first comparison read of
+    a freshly ingested route is served from route_metrics.
+    """
+    report = PrecomputeReport()
+    try:
+        for batch in batched(get_routes_pending_precompute(db), batch_size):
+            route_ids = [route_id for route_id, _ in batch]
+            unplanned = [route_id for route_id, has_plan in batch if not has_plan]
+
+            if unplanned:
+                stops_by_route = get_route_stops_bulk(db, route_ids=unplanned)
+                planned_routes, failed_routes = plan_routes(stops_by_route, mode=mode, improve_ms=improve_ms)
+                for route_id in unplanned:
+                    if route_id not in stops_by_route:
+                        failed_routes[route_id] = "No stops found for the given route"
+
+                save_planned_routes(db, planned_routes)
+                report.planned += len(planned_routes)
+                report.failed.update(failed_routes)
+
+            report.metrics += len(refresh_route_metrics(db, route_ids))
+            report.routes += len(batch)
+    finally:
+        shutdown_executor()
+
+    return report.finish()
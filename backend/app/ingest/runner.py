@@ -0,0 +1,132 @@
+import fnmatch
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from psycopg2 import errors
+
+from app.ingest.copy_loader import (
+    IngestReport,
+    batched,
+    connect,
+    merge_actual_batch,
+    merge_route_batch,
+    prepare_staging,
+)
+from app.ingest.sources import read_route_objects
+
+# Files in an ingest directory are matched by name; every route file is loaded
+# before any actual-sequence file, since sequences need their routes to exist
+ROUTE_FILES = "*route_data*.json"
+ACTUAL_FILES = "*actual_sequences*.json"
+
+# Concurrent upserts of the same key (a route repeated across files) can
+# deadlock; the losing transaction is retried
+MAX_ATTEMPTS = 3
+
+COMPLETED_BATCHES = """
+SELECT batch
+FROM ingest_checkpoints
+WHERE source = %s AND fingerprint = %s AND batch_size = %s
+"""
+
+RECORD_CHECKPOINT = """
+INSERT INTO ingest_checkpoints (source, fingerprint, batch_size, batch, routes, rows_written)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON CONFLICT (source, fingerprint, batch_size, batch) DO NOTHING
+"""
+
+# (kind, path, source, fingerprint, batch_size, dsn)
+IngestTask = Tuple[str, str, str, str, int, Optional[str]]
+
+
+def find_files(directory: str, pattern: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if fnmatch.fnmatch(name, pattern)
+    )
+
+
+def fingerprint(path: str) -> str:
+    # A file that's replaced or appended to gets a new fingerprint and is
+    # loaded again; unchanged rows are skipped by the merges anyway
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def merge_batch(kind: str, cur, batch: list) -> Tuple[int, int, List[str]]:
+    if kind == "routes":
+        return (*merge_route_batch(cur, batch), [])
+    return merge_actual_batch(cur, batch)
+
+
+def ingest_file(task: IngestTask) -> IngestReport:
+    # Each file is parsed once, by the worker that loads it
+    kind, path, source, file_fingerprint, batch_size, dsn = task
+    report = IngestReport(f"{kind} {source}")
+
+    conn = connect(dsn)
+    try:
+        prepare_staging(conn)
+        with conn.cursor() as cur:
+            cur.execute(COMPLETED_BATCHES, (source, file_fingerprint, batch_size))
+            done = {batch for (batch,) in cur.fetchall()}
+        conn.commit()
+
+        for index, batch in enumerate(batched(read_route_objects(path), batch_size)):
+            if index in done:
+                report.checkpointed_batches += 1
+                continue
+
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                try:
+                    with conn.cursor() as cur:
+                        rows, written, unknown = merge_batch(kind, cur, batch)
+                        # Recorded in the batch's own transaction, so a batch is
+                        # either fully loaded and checkpointed or neither
+                        cur.execute(RECORD_CHECKPOINT, (source, file_fingerprint, batch_size, index, len(batch), written))
+                    conn.commit()
+                    break
+                except (errors.DeadlockDetected, errors.SerializationFailure):
+                    conn.rollback()
+                    if attempt == MAX_ATTEMPTS:
+                        raise
+
+            report.routes += len(batch)
+            report.rows += rows
+            report.written += written
+            report.skipped_routes.extend(unknown)
+    finally:
+        conn.close()
+
+    return report.finish()
+
+
+def file_task(kind: str, path: str, directory: str, batch_size: int, dsn: Optional[str]) -> IngestTask:
+    return (kind, path, os.path.relpath(path, directory), fingerprint(path), batch_size, dsn)
+
+
+def ingest_directory(directory: str, workers: int, batch_size: int = 1000, dsn: Optional[str] = None) -> Iterator[IngestReport]:
+    """
+    Load every route file in `directory`, then every actual-sequence file,
+    spreading the files over `workers` processes with their own connections.
+    Yields a report per file and a total per phase.
+    """
+    route_files = find_files(directory, ROUTE_FILES)
+    actual_files = find_files(directory, ACTUAL_FILES)
+    if not route_files and not actual_files:
+        raise ValueError(f"No {ROUTE_FILES} or {ACTUAL_FILES} files in {directory}")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for kind, paths in (("routes", route_files), ("actual", actual_files)):
+            if not paths:
+                continue
+            total = IngestReport(f"{kind} total ({len(paths)} files, {workers} workers)")
+            # Submit every file up front so workers move straight on to the next one
+            futures = [executor.submit(ingest_file, file_task(kind, path, directory, batch_size, dsn)) for path in paths]
+            for future in futures:
+                report = future.result()
+                total.add(report)
+                yield report
+            yield total.finish()
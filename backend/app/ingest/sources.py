@@ -0,0 +1,92 @@
+import json
+import re
+from typing import Any, Iterator, TextIO, Tuple
+
+# Both input files are JSON arrays of single-key objects keyed by route id:
+#   route_data.json:        [{"RouteID_...": {"station_code": ..., "stops": {...}}}, ...]
+#   actual_sequences.json:  [{"RouteID_...": {"actual": {"stop_code": sequence, ...}}}, ...]
+#
+# Dumps can be larger than the ingest container's memory, so they are parsed
+# one array element at a time from a sliding text buffer.
+
+CHUNK_SIZE = 1 << 20
+# A single element larger than this is treated as a corrupt file
+MAX_ELEMENT_SIZE = 256 << 20
+
+_WHITESPACE = re.compile(r"\s*")
+_NUMBER_TAIL = frozenset(".eE+-0123456789")
+
+
+def iter_json_array(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array read from ``f``, holding about one element in memory."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size)
+    eof = not buffer
+
+    def fill(size: int = chunk_size) -> bool:
+        nonlocal buffer, eof
+        chunk = f.read(size)
+        eof = not chunk
+        buffer += chunk
+        return not eof
+
+    pos = _WHITESPACE.match(buffer).end()
+    while pos == len(buffer) and fill():
+        pos = _WHITESPACE.match(buffer, pos).end()
+    if buffer[pos:pos + 1] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    # What may come next: "[" is followed by a value or "]", a value by "," or
+    # "]", and "," by a value only (no empty or trailing elements)
+    expecting = "first"
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            buffer, pos = "", 0
+            if fill():
+                continue
+            raise ValueError("Unterminated JSON array")
+
+        char = buffer[pos]
+        if expecting == "separator":
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos += 1
+            expecting = "value"
+            continue
+        if char == "]" and expecting == "first":
+            return
+        if char in ",]":
+            raise ValueError(f"Expected a value in JSON array, got {char!r}")
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+            # A value that runs to the end of the buffer may be cut short, and
+            # so may a number cut at its "." or exponent ("12." decodes as 12)
+            complete = eof or (end < len(buffer) and buffer[end] not in _NUMBER_TAIL)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+
+        if not complete:
+            if len(buffer) - pos > MAX_ELEMENT_SIZE:
+                raise ValueError(f"JSON array element larger than {MAX_ELEMENT_SIZE} bytes")
+            # Drop what's been consumed, then at least double the buffer so an
+            # element spanning many chunks isn't re-parsed once per chunk
+            buffer, pos = buffer[pos:], 0
+            fill(max(chunk_size, len(buffer)))
+            continue
+
+        yield element
+        pos = end
+        expecting = "separator"
+
+
+def read_route_objects(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, dict]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for item in iter_json_array(f, chunk_size):
+            yield from item.items()
@@ -1,8 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.middleware import RequestMetricsMiddleware
 from app.api.routes import router as route_router
+from app.core.request_metrics import request_metrics
 from app.db.base import Base
-from app.db.session import engine
+from app.db.query_metrics import install_query_hooks
+from app.db.session import async_engine, engine, pool_metrics
+from app.services.batch_planner import shutdown_executor
+from app.services.cache import caches
+from app.services.shared_cache import shared_cache
 
 # Create all tables (for local/dev only)
 # In production use Alembic migrations
@@ -27,8 +34,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Per-route latency, SQL, serialization and planner timings for GET /metrics
+app.add_middleware(RequestMetricsMiddleware)
+install_query_hooks()
+
 # Register routers
 app.include_router(
     route_router,
@@ -36,7 +48,37 @@ app.include_router(
     tags=["Routes"]
 )
 
+@app.on_event("shutdown")
+def stop_planner_pool():
+    shutdown_executor()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
+@app.on_event("shutdown")
+async def close_shared_cache():
+    await shared_cache.close()
+
 # Health check
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+# Connection pool usage per engine: checkouts, wait time histogram, overflow
+@app.get("/metrics/db_pool")
+def db_pool_metrics():
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+# Read-through cache per entity: size, hits, misses, evictions
+@app.get("/metrics/cache")
+def cache_metrics():
+    return {
+        **{name: cache.snapshot() for name, cache in caches.items()},
+        "shared": shared_cache.snapshot(),
+    }
+
+# Prometheus scrape target: request histograms per route template
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(request_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
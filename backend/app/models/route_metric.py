@@ -5,6 +5,7 @@ from sqlalchemy import (
     Float,
     TIMESTAMP,
     ForeignKey,
+    Index,
     UniqueConstraint
 )
 from sqlalchemy.sql import func
@@ -39,6 +40,12 @@ class RouteMetric(Base):
 
     total_stops = Column(Integer)
 
+    # Order similarity (see services/sequence_metrics.py)
+    kendall_tau_distance = Column(Integer)
+    kendall_tau = Column(Float)
+    lcs_length = Column(Integer)
+    edit_distance = Column(Integer)
+
     generated_at = Column(
         TIMESTAMP(timezone=True),
         server_default=func.now(),
@@ -50,4 +57,5 @@ class RouteMetric(Base):
 
     __table_args__ = (
         UniqueConstraint("route_id", name="unique_route_metrics"),
+        Index("idx_route_metrics_generated_at", "generated_at"),
     )
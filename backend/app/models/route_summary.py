@@ -0,0 +1,31 @@
+from sqlalchemy import Index, Column, Integer, BigInteger, SmallInteger, String, Date, Time, Numeric, ForeignKey, TIMESTAMP
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+# Maintained by the refresh_route_summary() SQL function (see scripts/sql/init.sql)
+
+class RouteSummary(Base):
+    __tablename__ = "route_summary"
+
+    route_id = Column(String(50), ForeignKey("routes.route_id", ondelete="CASCADE"), primary_key=True)
+    station_code = Column(String(10))
+    date_YYYY_MM_DD = Column("date_yyyy_mm_dd", Date)
+    departure_time_utc = Column(Time)
+    executor_capacity_cm3 = Column(Numeric(10, 2))
+    route_score = Column(String(10))
+    stop_count = Column(Integer, nullable=False, server_default="0")
+    refreshed_at = Column(TIMESTAMP, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_route_summary_date_route", "date_yyyy_mm_dd", "route_id"),
+        Index("idx_route_summary_station_date_route", "station_code", "date_yyyy_mm_dd", "route_id"),
+        Index("idx_route_summary_refreshed_at", "refreshed_at"),
+    )
+
+
+class RouteTotals(Base):
+    __tablename__ = "route_totals"
+
+    id = Column(SmallInteger, primary_key=True)
+    route_count = Column(BigInteger, nullable=False, server_default="0")
+    stop_count = Column(BigInteger, nullable=False, server_default="0")
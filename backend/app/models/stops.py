@@ -8,8 +8,8 @@ class Stop(Base):
     stop_id = Column(Integer, primary_key=True)
     route_id = Column(String(50), ForeignKey("routes.route_id", ondelete="CASCADE"))
     stop_code = Column(String(10))
-    lat = Column(Numeric(9, 6))
-    lng = Column(Numeric(9, 6))
+    lat = Column(Numeric(9, 6, asdecimal=False))
+    lng = Column(Numeric(9, 6, asdecimal=False))
     type = Column(String(20))
     zone_id = Column(String(20))
 
@@ -0,0 +1,172 @@
+from datetime import date
+from typing import AsyncIterator, List
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.stops import Stop
+from app.models.routes import Route
+from app.models.actual_route_sequence import ActualRouteSequence
+from app.models.planned_route_sequence import PlannedRouteSequence
+from app.models.route_metric import RouteMetric
+from app.models.route_summary import RouteSummary, RouteTotals
+from app.services.cache import (
+    actual_sequence_cache,
+    cached,
+    route_cache,
+    route_metric_cache,
+    stops_cache,
+)
+from app.repositories.route_repository import (
+    analytics_from_row,
+    comparison_from_row,
+    route_comparison_stmt,
+    route_metric_analytics_stmt,
+    routes_export_stmt,
+    routes_page,
+    routes_page_stmts,
+    summary_to_dict,
+)
+
+# Async counterparts of the read functions in route_repository, for the
+# endpoints that run on the event loop (AsyncSession + asyncpg)
+
+
+async def get_all_routes(db: AsyncSession):
+    result = await db.scalars(select(RouteSummary))
+    return [summary_to_dict(summary) for summary in result]
+
+
+async def get_total_routes_total_stops(db: AsyncSession):
+    totals = await db.get(RouteTotals, 1)
+
+    return {
+        "route_count": totals.route_count if totals else 0,
+        "stop_count": totals.stop_count if totals else 0,
+    }
+
+
+async def get_listing_version(db: AsyncSession) -> tuple:
+    # What the route listings depend on: the totals row plus the newest
+    # route_summary refresh (ingest refreshes every route it touches). Both
+    # are single-row or index-only lookups.
+    result = await db.execute(
+        select(
+            RouteTotals.route_count,
+            RouteTotals.stop_count,
+            select(func.max(RouteSummary.refreshed_at)).scalar_subquery(),
+        )
+        .where(RouteTotals.id == 1)
+    )
+    return tuple(result.first() or ())
+
+
+async def get_analytics_version(db: AsyncSession) -> tuple:
+    # The listing version plus the newest route_metrics write, which planning,
+    # precompute and recompute all bump
+    newest_metrics = await db.scalar(select(func.max(RouteMetric.generated_at)))
+    return (*await get_listing_version(db), newest_metrics)
+
+
+async def get_all_routes_paginated(
+    db: AsyncSession,
+    limit: int = 10,
+    after: tuple[date | None, str] | None = None,
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> tuple[List[dict], tuple[date | None, str] | None]:
+    rows = []
+    for stmt in routes_page_stmts(after, station_code, date_from, date_to):
+        rows += list(await db.scalars(stmt.limit(limit + 1 - len(rows))))
+        if len(rows) > limit:
+            break
+
+    return routes_page(rows, limit)
+
+
+
+async def get_route_metric_analytics(
+    db: AsyncSession,
+    group_by: str,
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> List[dict]:
+    result = await db.execute(route_metric_analytics_stmt(group_by, station_code, date_from, date_to))
+    return [analytics_from_row(row) for row in result]
+
+
+@cached(route_cache)
+async def get_route(db: AsyncSession, route_id: str):
+    return await db.scalar(select(Route).where(Route.route_id == route_id))
+
+
+@cached(stops_cache)
+async def get_route_stops(db: AsyncSession, route_id: str):
+    result = await db.scalars(select(Stop).where(Stop.route_id == route_id))
+    return list(result)
+
+
+@cached(actual_sequence_cache)
+async def get_actual_route_sequence(db: AsyncSession, route_id: str):
+    result = await db.scalars(
+        select(ActualRouteSequence)
+        .where(ActualRouteSequence.route_id == route_id)
+        .order_by(ActualRouteSequence.actual_sequence)
+    )
+    return list(result)
+
+
+@cached(route_metric_cache)
+async def get_route_metric(db: AsyncSession, route_id: str):
+    return await db.scalar(select(RouteMetric).where(RouteMetric.route_id == route_id))
+
+
+async def get_route_with_sequences(db: AsyncSession, route_id: str):
+    result = await db.execute(route_comparison_stmt(route_id))
+    return comparison_from_row(result.first())
+
+
+async def get_route_version(db: AsyncSession, route_id: str):
+    # Everything a route's read endpoints depend on, from indexed lookups only:
+    # the route row, its summary (refreshed whenever ingest upserts the route
+    # or its stops), newest write and size of each sequence and the metrics
+    # timestamp. None if the route doesn't exist.
+    def scalar(*columns, where):
+        return select(*columns).where(where).scalar_subquery()
+
+    result = await db.execute(
+        select(
+            Route.created_at,
+            scalar(RouteSummary.stop_count, where=RouteSummary.route_id == route_id),
+            scalar(RouteSummary.refreshed_at, where=RouteSummary.route_id == route_id),
+            scalar(func.max(PlannedRouteSequence.created_at), where=PlannedRouteSequence.route_id == route_id),
+            scalar(func.count(), where=PlannedRouteSequence.route_id == route_id),
+            scalar(func.max(ActualRouteSequence.recorded_at), where=ActualRouteSequence.route_id == route_id),
+            scalar(func.count(), where=ActualRouteSequence.route_id == route_id),
+            scalar(RouteMetric.generated_at, where=RouteMetric.route_id == route_id),
+        )
+        .where(Route.route_id == route_id)
+    )
+    return result.first()
+
+
+async def stream_routes_with_sequences(
+    db: AsyncSession,
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    batch_size: int = 100,
+) -> AsyncIterator[List[dict]]:
+    # Server-side cursor: rows arrive `batch_size` at a time, so memory stays
+    # flat however many routes match
+    result = await db.stream(
+        routes_export_stmt(station_code, date_from, date_to).execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield [comparison_from_row(row) for row in rows]
+
+
+async def stream_rows(db: AsyncSession, stmt, batch_size: int) -> AsyncIterator[list]:
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
@@ -1,5 +1,8 @@
+from datetime import date
 from typing import List
+from sqlalchemy import Float, String, and_, cast, literal, or_, select, true, tuple_
 from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from app.models.stops import Stop
 from sqlalchemy.orm import Session
 from app.models.routes import Route
@@ -8,114 +11,114 @@ from app.models.actual_route_sequence import ActualRouteSequence
 from app.models.planned_route_sequence import PlannedRouteSequence
 from sqlalchemy.dialects.postgresql import insert
 from app.models.route_metric import RouteMetric
-
+from app.models.route_summary import RouteSummary, RouteTotals
+from app.services.cache import (
+    cached,
+    compact_route_cache,
+    route_cache,
+    route_metric_cache,
+)
+from app.services.compact_route import CompactRoute
+from app.services.route_comparison import METRIC_FIELDS, SEQUENCE_COLUMNS, compute_route_metrics_bulk, empty_sequence
+
+
+# Stop columns in CompactRoute.from_rows order; lat/lng cast to float in SQL so
+# the driver never builds Decimals
+STOP_COLUMNS = (
+    Stop.stop_code,
+    cast(Stop.lat, Float),
+    cast(Stop.lng, Float),
+    Stop.type,
+    Stop.zone_id,
+)
+
+
+def summary_to_dict(summary: RouteSummary) -> dict:
+    return {
+        "route_id": summary.route_id,
+        "station_code": summary.station_code,
+        "date_YYYY_MM_DD": summary.date_YYYY_MM_DD,
+        "departure_time_utc": summary.departure_time_utc,
+        "stop_count": summary.stop_count,
+        "executor_capacity_cm3": summary.executor_capacity_cm3,
+        "route_score": summary.route_score,
+    }
 
 
 def get_all_routes(db: Session):
-    # return db.query(Route).all()
-    rows = (
-        db.query(
-            Route,
-            func.count(Stop.stop_code).label("stop_count")
-        )
-        .outerjoin(Stop, Route.route_id == Stop.route_id)
-        .group_by(Route.route_id)
-        .all()
-    )
-
-    result = []
-    for route, stop_count in rows:
-        result.append({
-            "route_id": route.route_id,
-            "station_code": route.station_code,
-            "date_YYYY_MM_DD": route.date_YYYY_MM_DD,
-            "departure_time_utc": route.departure_time_utc,
-            "executor_capacity_cm3": route.executor_capacity_cm3,
-            "route_score": route.route_score,
-            "stop_count": stop_count,
-        })
-
-    return result
+    # Stop counts come from route_summary, kept current by refresh_route_summary()
+    return [summary_to_dict(summary) for summary in db.query(RouteSummary).all()]
 
 
 def get_total_routes_total_stops(db: Session):
-    result = (
-        db.query(
-            func.count(func.distinct(Route.route_id)).label("route_count"),
-            func.count(Stop.route_id).label("stop_count"),
-        )
-        .outerjoin(Stop, Stop.route_id == Route.route_id)
-        .one()
-    )
+    totals = db.query(RouteTotals).filter(RouteTotals.id == 1).first()
 
     return {
-        "route_count": result.route_count,
-        "stop_count": result.stop_count,
+        "route_count": totals.route_count if totals else 0,
+        "stop_count": totals.stop_count if totals else 0,
     }
 
 
-
-
-def get_all_routes_paginated(db: Session, skip: int = 0, limit: int = 10) -> List[Route]:
-    # return db.query(Route).offset(skip).limit(limit).all()
-    rows = (
-            db.query(
-                Route,
-                func.count(Stop.stop_code).label("stop_count")
-            )
-            .outerjoin(Stop, Stop.route_id == Route.route_id)
-            .group_by(Route.route_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    
-    result = []
-    for route, stop_count in rows:
-        result.append({
-            "route_id": route.route_id,
-            "station_code": route.station_code,
-            "date_YYYY_MM_DD": route.date_YYYY_MM_DD,
-            "departure_time_utc": route.departure_time_utc,
-            "executor_capacity_cm3": route.executor_capacity_cm3,
-            "route_score": route.route_score,
-            "stop_count": stop_count,
-        })
-
-    return result
-
-
+def routes_page_stmts(
+    after: tuple[date | None, str] | None = None,
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list:
+    # Keyset pagination on (date, route_id), NULL dates last: each page seeks
+    # straight to its first row through the composite indexes instead of
+    # skipping OFFSET rows. A row comparison never matches a NULL date, so
+    # dated and undated routes are read by separate range scans, run in order
+    # until the page is full.
+    def filtered(stmt):
+        if station_code is not None:
+            stmt = stmt.where(RouteSummary.station_code == station_code)
+        if date_from is not None:
+            stmt = stmt.where(RouteSummary.date_YYYY_MM_DD >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(RouteSummary.date_YYYY_MM_DD <= date_to)
+        return stmt
+
+    stmts = []
+    if after is None or after[0] is not None:
+        dated = filtered(select(RouteSummary)).where(RouteSummary.date_YYYY_MM_DD.isnot(None))
+        if after is not None:
+            dated = dated.where(tuple_(RouteSummary.date_YYYY_MM_DD, RouteSummary.route_id) > after)
+        stmts.append(dated.order_by(RouteSummary.date_YYYY_MM_DD, RouteSummary.route_id))
+
+    # A date range never matches a NULL date
+    if date_from is None and date_to is None:
+        undated = filtered(select(RouteSummary)).where(RouteSummary.date_YYYY_MM_DD.is_(None))
+        if after is not None and after[0] is None:
+            undated = undated.where(RouteSummary.route_id > after[1])
+        stmts.append(undated.order_by(RouteSummary.route_id))
+
+    return stmts
+
+
+def routes_page(rows: List[RouteSummary], limit: int) -> tuple[List[dict], tuple[date | None, str] | None]:
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_key = (rows[-1].date_YYYY_MM_DD, rows[-1].route_id)
+
+    return [summary_to_dict(summary) for summary in rows], next_key
+
+
+@cached(route_cache)
 def get_route(db: Session, route_id: str):
     return db.query(Route).filter(Route.route_id == route_id).first()
 
-def get_route_stops(db: Session, route_id: str):
-    return (
-        db.query(Stop)
+@cached(compact_route_cache)
+def get_compact_route(db: Session, route_id: str) -> CompactRoute | None:
+    # Planner input: plain columns into float64 arrays, no ORM Stop objects
+    rows = (
+        db.query(*STOP_COLUMNS)
         .filter(Stop.route_id == route_id)
+        .order_by(Stop.stop_id)
         .all()
     )
-
-def get_actual_route_sequence(db: Session, route_id: str):
-    return (
-        db.query(ActualRouteSequence)
-        .filter(ActualRouteSequence.route_id == route_id)
-        .order_by(ActualRouteSequence.actual_sequence)
-        .all()
-    )
-
-def get_route_with_stops(db: Session, route_id: str):
-    route = db.query(Route).filter(Route.route_id == route_id).first()
-    if not route:
-        return None
-
-    stops = db.query(Stop).filter(Stop.route_id == route_id).all()
-    actual_stops = db.query(ActualRouteSequence).filter(ActualRouteSequence.route_id == route_id).all()
-
-    return {
-        "route": route,
-        "stops": stops,
-        "actual_stops": actual_stops
-    }
+    return CompactRoute.from_rows(route_id, rows) if rows else None
 
 def save_planned_route(db: Session, route_id: str, planned_route: list[dict]):
     records = [
@@ -129,104 +132,384 @@ def save_planned_route(db: Session, route_id: str, planned_route: list[dict]):
 
     stmt = insert(PlannedRouteSequence).values(records)
 
-    stmt = stmt.on_conflict_do_nothing(
-        index_elements=["route_id", "stop_code"]
+    # Re-plans (e.g. with a different mode or improvement budget) overwrite the old sequence
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["route_id", "stop_code"],
+        set_={
+            "planned_sequence": stmt.excluded.planned_sequence,
+            "created_at": func.now(),
+        }
     )
 
     db.execute(stmt)
     db.commit()
 
-def get_planned_route(db: Session, route_id: str):
-    rows = (
-        db.query(
-            PlannedRouteSequence.stop_code,
-            PlannedRouteSequence.planned_sequence,
-            Stop.lat,
-            Stop.lng,
-            Stop.zone_id,
-            Stop.type,
+def get_route_stops_bulk(
+    db: Session,
+    route_ids: List[str] | None = None,
+    station_code: str | None = None,
+    date_YYYY_MM_DD: date | None = None,
+) -> dict[str, CompactRoute]:
+    # One column query for every matching route's stops, grouped by route_id
+    query = db.query(Stop.route_id, *STOP_COLUMNS)
+
+    if route_ids is not None:
+        query = query.filter(Stop.route_id.in_(route_ids))
+    if station_code is not None or date_YYYY_MM_DD is not None:
+        query = query.join(Route, Route.route_id == Stop.route_id)
+        if station_code is not None:
+            query = query.filter(Route.station_code == station_code)
+        if date_YYYY_MM_DD is not None:
+            query = query.filter(Route.date_YYYY_MM_DD == date_YYYY_MM_DD)
+
+    rows_by_route = {}
+    for r in query.order_by(Stop.route_id, Stop.stop_id).all():
+        rows_by_route.setdefault(r.route_id, []).append(tuple(r)[1:])
+
+    return {route_id: CompactRoute.from_rows(route_id, rows) for route_id, rows in rows_by_route.items()}
+
+def save_planned_routes(db: Session, planned_routes: dict[str, list[tuple]]):
+    records = [
+        {
+            "route_id": route_id,
+            "stop_code": stop_code,
+            "planned_sequence": planned_sequence,
+        }
+        for route_id, sequence in planned_routes.items()
+        for stop_code, planned_sequence in sequence
+    ]
+    if not records:
+        return
+
+    stmt = insert(PlannedRouteSequence)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["route_id", "stop_code"],
+        set_={
+            "planned_sequence": stmt.excluded.planned_sequence,
+            "created_at": func.now(),
+        }
+    )
+
+    # executemany: SQLAlchemy batches this into multi-row INSERTs
+    db.execute(stmt, records)
+    db.commit()
+
+def _sequence_arrays(sequence_model, sequence_column, timestamp_column, name: str):
+    # One row of parallel arrays (stop_code, sequence, lat, lng, zone_id, type)
+    # for a route's planned or actual sequence, correlated to routes.route_id,
+    # plus the time that sequence was last written
+    def ordered(column):
+        return func.array_agg(aggregate_order_by(column, sequence_column))
+
+    return (
+        select(
+            ordered(sequence_model.stop_code).label("stop_code"),
+            ordered(sequence_column).label("sequence"),
+            ordered(cast(Stop.lat, Float)).label("lat"),
+            ordered(cast(Stop.lng, Float)).label("lng"),
+            ordered(Stop.zone_id).label("zone_id"),
+            ordered(Stop.type).label("type"),
+            func.max(timestamp_column).label("updated_at"),
         )
-        .join(Stop, 
-              (Stop.route_id == PlannedRouteSequence.route_id) &
-              (Stop.stop_code == PlannedRouteSequence.stop_code)
+        .select_from(sequence_model)
+        .join(Stop,
+              (Stop.route_id == sequence_model.route_id) &
+              (Stop.stop_code == sequence_model.stop_code)
         )
-        .filter(PlannedRouteSequence.route_id == route_id)
-        .order_by(PlannedRouteSequence.planned_sequence.asc())
-        .all()
+        .where(sequence_model.route_id == Route.route_id)
+        .lateral(name)
     )
 
-    return [
-        {
-            "stop_code": r.stop_code,
-            "planned_sequence": r.planned_sequence,
-            "lat": r.lat,
-            "lng": r.lng,
-            "zone_id": r.zone_id,
-            "type": r.type,
-        }
-        for r in rows
-    ]
 
-def get_actual_route(db: Session, route_id: str):
-    rows = (
-        db.query(
-            ActualRouteSequence.stop_code,
-            ActualRouteSequence.actual_sequence,
+def routes_with_sequences_stmt(*criteria):
+    planned = _sequence_arrays(
+        PlannedRouteSequence, PlannedRouteSequence.planned_sequence, PlannedRouteSequence.created_at, "planned"
+    )
+    actual = _sequence_arrays(
+        ActualRouteSequence, ActualRouteSequence.actual_sequence, ActualRouteSequence.recorded_at, "actual"
+    )
+
+    # Stored metrics are fresh when generated no earlier than the newest write
+    # to either sequence (GREATEST skips NULLs, i.e. a missing sequence) and
+    # after the order-similarity columns were added
+    sequences_updated_at = func.greatest(planned.c.updated_at, actual.c.updated_at)
+    metrics_fresh = and_(
+        RouteMetric.generated_at.isnot(None),
+        RouteMetric.edit_distance.isnot(None),
+        or_(sequences_updated_at.is_(None), RouteMetric.generated_at >= sequences_updated_at),
+    )
+
+    return (
+        select(
+            Route,
+            RouteMetric,
+            metrics_fresh.label("metrics_fresh"),
+            *(planned.c[column].label(f"planned_{column}") for column in SEQUENCE_COLUMNS),
+            *(actual.c[column].label(f"actual_{column}") for column in SEQUENCE_COLUMNS),
+        )
+        .select_from(Route)
+        .outerjoin(planned, true())
+        .outerjoin(actual, true())
+        .outerjoin(RouteMetric, RouteMetric.route_id == Route.route_id)
+        .where(*criteria)
+    )
+
+
+def route_criteria(
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list:
+    criteria = []
+    if station_code is not None:
+        criteria.append(Route.station_code == station_code)
+    if date_from is not None:
+        criteria.append(Route.date_YYYY_MM_DD >= date_from)
+    if date_to is not None:
+        criteria.append(Route.date_YYYY_MM_DD <= date_to)
+    return criteria
+
+
+def routes_export_stmt(
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    return (
+        routes_with_sequences_stmt(*route_criteria(station_code, date_from, date_to))
+        .order_by(Route.date_YYYY_MM_DD, Route.route_id)
+    )
+
+
+def snapshot_stops_stmt(
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    # One flat row per stop with its route's date/station and both sequence
+    # positions (NULL where the stop isn't in that sequence)
+    return (
+        select(
+            Route.route_id,
+            Route.date_YYYY_MM_DD.label("date"),
+            Route.station_code,
+            Stop.stop_code,
             Stop.lat,
             Stop.lng,
-            Stop.zone_id,
             Stop.type,
+            Stop.zone_id,
+            PlannedRouteSequence.planned_sequence,
+            ActualRouteSequence.actual_sequence,
         )
-        .join(Stop,
-              (Stop.route_id == ActualRouteSequence.route_id) &
-              (Stop.stop_code == ActualRouteSequence.stop_code)
+        .select_from(Stop)
+        .join(Route, Route.route_id == Stop.route_id)
+        .outerjoin(PlannedRouteSequence,
+                   (PlannedRouteSequence.route_id == Stop.route_id) &
+                   (PlannedRouteSequence.stop_code == Stop.stop_code)
         )
-        .filter(ActualRouteSequence.route_id == route_id)
-        .order_by(ActualRouteSequence.actual_sequence.asc())
-        .all()
+        .outerjoin(ActualRouteSequence,
+                   (ActualRouteSequence.route_id == Stop.route_id) &
+                   (ActualRouteSequence.stop_code == Stop.stop_code)
+        )
+        .where(*route_criteria(station_code, date_from, date_to))
+        .order_by(Route.date_YYYY_MM_DD, Route.route_id, Stop.stop_id)
     )
 
-    return [
-        {
-            "stop_code": r.stop_code,
-            "actual_sequence": r.actual_sequence,
-            "lat": r.lat,
-            "lng": r.lng,
-            "zone_id": r.zone_id,
-            "type": r.type,
-        }
-        for r in rows
-    ]
 
+def snapshot_routes_stmt(
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    # One row per route with its stored metrics (NULL until computed)
+    return (
+        select(
+            Route.route_id,
+            Route.date_YYYY_MM_DD.label("date"),
+            Route.station_code,
+            Route.departure_time_utc,
+            cast(Route.executor_capacity_cm3, Float).label("executor_capacity_cm3"),
+            Route.route_score,
+            *(getattr(RouteMetric, field) for field in METRIC_FIELDS),
+        )
+        .select_from(Route)
+        .outerjoin(RouteMetric, RouteMetric.route_id == Route.route_id)
+        .where(*route_criteria(station_code, date_from, date_to))
+        .order_by(Route.date_YYYY_MM_DD, Route.route_id)
+    )
 
-def save_route_metrics(db: Session, route_id: str, metric: dict):
-    stmt = insert(RouteMetric).values(
-        route_id=route_id,
-        **metric
+
+def route_comparison_stmt(route_id: str):
+    return routes_with_sequences_stmt(Route.route_id == route_id)
+
+
+def comparison_from_row(row) -> dict | None:
+    if row is None:
+        return None
+
+    def columns(prefix: str) -> dict:
+        # array_agg over no rows is NULL; normalise to empty columns
+        if getattr(row, f"{prefix}_stop_code") is None:
+            return empty_sequence()
+        return {column: getattr(row, f"{prefix}_{column}") for column in SEQUENCE_COLUMNS}
+
+    return {
+        "route": row.Route,
+        "planned": columns("planned"),
+        "actual": columns("actual"),
+        "metrics": row.RouteMetric,
+        "metrics_fresh": bool(row.metrics_fresh),
+    }
+
+
+def get_route_with_sequences(db: Session, route_id: str):
+    # Route, both sequences (with stop coordinates) and any stored metrics in a
+    # single round trip
+    return comparison_from_row(db.execute(route_comparison_stmt(route_id)).first())
+
+
+def get_routes_with_sequences(db: Session, route_ids: List[str]) -> dict[str, dict]:
+    rows = db.execute(routes_with_sequences_stmt(Route.route_id.in_(route_ids)))
+    return {row.Route.route_id: comparison_from_row(row) for row in rows}
+
+
+def refresh_route_metrics(db: Session, route_ids: List[str]) -> dict[str, dict]:
+    # Recompute and store metrics for routes whose planned or actual sequence
+    # changed; reads only ever serve these rows or compute in memory
+    comparisons = get_routes_with_sequences(db, route_ids)
+    metrics = compute_route_metrics_bulk({
+        route_id: (comparison["planned"], comparison["actual"])
+        for route_id, comparison in comparisons.items()
+    })
+    save_route_metrics_bulk(db, metrics)
+    return metrics
+
+
+def get_routes_pending_precompute(db: Session) -> List[tuple]:
+    # (route_id, has_planned_route) for routes with no planned sequence, or
+    # whose stored metrics are missing or older than either sequence
+    planned_at = (
+        select(func.max(PlannedRouteSequence.created_at))
+        .where(PlannedRouteSequence.route_id == Route.route_id)
+        .scalar_subquery()
+    )
+    actual_at = (
+        select(func.max(ActualRouteSequence.recorded_at))
+        .where(ActualRouteSequence.route_id == Route.route_id)
+        .scalar_subquery()
     )
 
+    rows = (
+        db.query(Route.route_id, planned_at.isnot(None).label("planned"))
+        .outerjoin(RouteMetric, RouteMetric.route_id == Route.route_id)
+        .filter(or_(
+            planned_at.is_(None),
+            RouteMetric.generated_at.is_(None),
+            RouteMetric.edit_distance.is_(None),
+            RouteMetric.generated_at < func.greatest(planned_at, actual_at),
+        ))
+        .order_by(Route.route_id)
+        .all()
+    )
+    return [(r.route_id, r.planned) for r in rows]
+
+
+def save_route_metrics_bulk(db: Session, metrics: dict[str, dict]):
+    records = [{"route_id": route_id, **metric} for route_id, metric in metrics.items()]
+    if not records:
+        return
+
+    stmt = insert(RouteMetric)
     stmt = stmt.on_conflict_do_update(
         index_elements=["route_id"],
         set_={
-            "total_planned_distance_km": metric["total_planned_distance_km"],
-            "total_actual_distance_km": metric["total_actual_distance_km"],
-            "distance_delta_km": metric["distance_delta_km"],
-            "distance_delta_percent": metric["distance_delta_percent"],
-            "order_matched_stops": metric["order_matched_stops"],
-            "order_match_percentage": metric["order_match_percentage"],
-            "prefix_match_count": metric["prefix_match_count"],
-            "total_stops": metric["total_stops"],
+            **{field: stmt.excluded[field] for field in METRIC_FIELDS},
             "generated_at": func.now(),
         }
     )
 
-    db.execute(stmt)
+    db.execute(stmt, records)
     db.commit()
+    for route_id in metrics:
+        route_metric_cache.invalidate(route_id)
 
 
+@cached(route_metric_cache)
 def get_route_metric(db: Session, route_id: str):
     return (
         db.query(RouteMetric)
         .filter(RouteMetric.route_id == route_id)
         .first()
-    )
\ No newline at end of file
+    )
+
+
+# Metrics summarised by the analytics endpoint, and the percentiles reported
+# for each of them
+ANALYTICS_FIELDS = ("distance_delta_percent", "order_match_percentage", "prefix_match_count")
+ANALYTICS_PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+def route_metric_analytics_stmt(
+    group_by: str,
+    station_code: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    # One aggregate row per group over the stored route_metrics; all
+    # percentiles of a metric come from a single ordered-set aggregate
+    if group_by == "zone":
+        # A route counts once towards every zone it visits. LATERAL, so only
+        # the stops of routes that pass the filters are read (by route_id index)
+        zones = (
+            select(Stop.zone_id)
+            .where(Stop.route_id == Route.route_id, Stop.zone_id.isnot(None))
+            .distinct()
+            .lateral("route_zones")
+        )
+        key = zones.c.zone_id
+    else:
+        key = {
+            "station_code": Route.station_code,
+            "date": Route.date_YYYY_MM_DD,
+            "route_score": Route.route_score,
+        }[group_by]
+
+    percentiles = literal(list(ANALYTICS_PERCENTILES), ARRAY(Float))
+    columns = [cast(key, String).label("key"), func.count().label("route_count")]
+    for field in ANALYTICS_FIELDS:
+        column = getattr(RouteMetric, field)
+        columns += [
+            func.avg(column).label(f"{field}_mean"),
+            func.min(column).label(f"{field}_min"),
+            func.max(column).label(f"{field}_max"),
+            func.percentile_cont(percentiles, type_=ARRAY(Float)).within_group(column).label(f"{field}_percentiles"),
+        ]
+
+    stmt = select(*columns).select_from(RouteMetric).join(Route, Route.route_id == RouteMetric.route_id)
+    if group_by == "zone":
+        stmt = stmt.join(zones, true())
+
+    if station_code is not None:
+        stmt = stmt.where(Route.station_code == station_code)
+    if date_from is not None:
+        stmt = stmt.where(Route.date_YYYY_MM_DD >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Route.date_YYYY_MM_DD <= date_to)
+
+    return stmt.group_by(key).order_by(key)
+
+
+def analytics_from_row(row) -> dict:
+    def rounded(value):
+        return None if value is None else round(float(value), 2)
+
+    group = {"key": row.key, "route_count": row.route_count}
+    for field in ANALYTICS_FIELDS:
+        percentiles = getattr(row, f"{field}_percentiles") or [None] * len(ANALYTICS_PERCENTILES)
+        group[field] = {
+            "mean": rounded(getattr(row, f"{field}_mean")),
+            "min": rounded(getattr(row, f"{field}_min")),
+            **{f"p{round(p * 100)}": rounded(value) for p, value in zip(ANALYTICS_PERCENTILES, percentiles)},
+            "max": rounded(getattr(row, f"{field}_max")),
+        }
+    return group
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from datetime import date
+from pydantic import BaseModel, model_validator
+from typing import Dict, List, Optional
 from app.schemas.route import RouteResponse
 
 
@@ -18,3 +19,21 @@ class PlannedRouteResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BatchPlanRequest(BaseModel):
+    route_ids: Optional[List[str]] = None
+    station_code: Optional[str] = None
+    date_YYYY_MM_DD: Optional[date] = None
+
+    @model_validator(mode="after")
+    def require_selection(self):
+        if self.route_ids is None and self.station_code is None and self.date_YYYY_MM_DD is None:
+            raise ValueError("Provide route_ids or a station_code / date_YYYY_MM_DD filter")
+        return self
+
+
+class BatchPlanResponse(BaseModel):
+    planned_route_count: int
+    planned_stop_count: int
+    failed_routes: Dict[str, str]
@@ -1,3 +1,6 @@
+from enum import Enum
+from typing import List
+
 from pydantic import BaseModel
 
 from app.schemas.route import RouteResponse
@@ -18,9 +21,44 @@ class RouteMetricBase(BaseModel):
     prefix_match_count: int | None = None
     total_stops: int | None = None
 
+    kendall_tau_distance: int | None = None
+    kendall_tau: float | None = None
+    lcs_length: int | None = None
+    edit_distance: int | None = None
+
 class RouteMetricRepsonse(BaseModel):
     route: RouteResponse
     metrics: RouteMetricBase
     
     class Config:
         from_attributes = True
+
+
+class AnalyticsGroupBy(str, Enum):
+    STATION_CODE = "station_code"
+    DATE = "date"
+    ROUTE_SCORE = "route_score"
+    ZONE = "zone"
+
+
+class MetricDistribution(BaseModel):
+    mean: float | None = None
+    min: float | None = None
+    p25: float | None = None
+    p50: float | None = None
+    p75: float | None = None
+    p90: float | None = None
+    max: float | None = None
+
+
+class RouteAnalyticsGroup(BaseModel):
+    key: str | None
+    route_count: int
+    distance_delta_percent: MetricDistribution
+    order_match_percentage: MetricDistribution
+    prefix_match_count: MetricDistribution
+
+
+class RouteAnalyticsResponse(BaseModel):
+    group_by: AnalyticsGroupBy
+    groups: List[RouteAnalyticsGroup]
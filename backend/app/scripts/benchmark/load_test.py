@@ -0,0 +1,138 @@
+"""
+Closed-loop HTTP load test for the read endpoints.
+
+Runs the same request mix against one or more deployments and prints
+requests/sec and latency percentiles for each; the first target is the
+baseline the others are compared against.
+
+The sync stack the async read path replaced is commit 65a882e ("Switch GET
+/routes to keyset cursor pagination"). To compare the two, serve that commit
+and the current tree side by side against the same database:
+
+    git worktree add ../route-sync 65a882e
+    (cd ../route-sync/backend && uvicorn app.main:app --port 8001) &
+    (cd backend && uvicorn app.main:app --port 8000) &
+
+    python -m app.scripts.benchmark.load_test \\
+        --target sync=http://localhost:8001/api/v1 \\
+        --target async=http://localhost:8000/api/v1 \\
+        --concurrency 64 --duration 30
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def sample_route_ids(client: httpx.AsyncClient, base_url: str, count: int):
+    res = await client.get(f"{base_url}/routes", params={"limit": min(count, 100)})
+    res.raise_for_status()
+    return [route["route_id"] for route in res.json()]
+
+
+def request_mix(route_ids):
+    # Weighted like the dashboard: listing + stats on load, then per-route views
+    paths = ["/routes?limit=25", "/routes/total_routes_and_stops"]
+    for route_id in route_ids:
+        paths += [
+            f"/routes/{route_id}",
+            f"/routes/{route_id}/stops",
+            f"/routes/{route_id}/actual",
+            f"/routes/{route_id}/metrics",
+        ]
+    return paths
+
+
+async def worker(client, base_url, paths, deadline, latencies, errors):
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        start = time.perf_counter()
+        try:
+            res = await client.get(base_url + path)
+            # 404 is a valid answer (e.g. metrics not generated yet)
+            if res.status_code >= 500:
+                errors.append(res.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_target(name, base_url, concurrency, duration, route_sample):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        paths = request_mix(await sample_route_ids(client, base_url, route_sample))
+
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, base_url, paths, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def parse_target(value: str):
+    name, sep, url = value.partition("=")
+    if not sep:
+        name, url = value, value
+    return name, url.rstrip("/")
+
+
+async def main_async(args):
+    results = []
+    for name, url in args.target:
+        print(f"⏱  {name}: {args.concurrency} clients for {args.duration}s against {url}")
+        results.append(await run_target(name, url, args.concurrency, args.duration, args.routes))
+
+    print(f"\n{'target':<12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(
+            f"{r['name']:<12}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.1f}"
+            f"{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}"
+        )
+
+    if len(results) > 1:
+        baseline = results[0]
+        for r in results[1:]:
+            print(
+                f"\n{r['name']} vs {baseline['name']}: "
+                f"{r['rps'] / baseline['rps']:.2f}x req/s, "
+                f"p99 {r['p99']:.1f} ms vs {baseline['p99']:.1f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", type=parse_target, action="append", required=True,
+                        help="name=base_url; the first target is the baseline")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--routes", type=int, default=50, help="route IDs to sample for per-route calls")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare RoutePlanner modes on synthetic routes.
+
+Usage (from backend/):
+    python -m app.scripts.benchmark.planner_benchmark [--sizes 50 500 5000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.services.router_planner import PlannerMode, RoutePlanner
+
+
+def make_stops(count: int, seed: int = 7):
+    # Stops scattered over a ~10 km box around a station, like a delivery area
+    rng = random.Random(seed)
+    stops = [
+        SimpleNamespace(
+            stop_code=f"S{i}",
+            lat=round(34.0 + rng.random() * 0.1, 6),
+            lng=round(-118.3 + rng.random() * 0.1, 6),
+            type="Dropoff",
+            zone_id=None,
+        )
+        for i in range(count)
+    ]
+    stops[0].type = "Station"
+    return stops
+
+
+def time_mode(stops, mode: PlannerMode, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        RoutePlanner(None, stops, mode=mode).generate_planned_route()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = [PlannerMode.MATRIX, PlannerMode.KDTREE]
+    print(f"{'stops':>8}" + "".join(f"{mode.value + ' (ms)':>16}" for mode in modes) + f"{'fastest':>10}")
+
+    crossover = None
+    for size in args.sizes:
+        stops = make_stops(size)
+        timings = {mode: time_mode(stops, mode, args.repeat) for mode in modes}
+        fastest = min(timings, key=timings.get)
+
+        if crossover is None and fastest == PlannerMode.KDTREE:
+            crossover = size
+
+        print(f"{size:>8}" + "".join(f"{timings[mode]:>16.1f}" for mode in modes) + f"{fastest.value:>10}")
+
+    if crossover is None:
+        print("\nmatrix mode was fastest at every size tested")
+    else:
+        print(f"\nkdtree mode overtakes matrix mode by {crossover} stops")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Time response serialization for the largest payloads: FastAPI's default path
+(response_model validation + jsonable_encoder + json.dumps) against
+FastJSONResponse (orjson, no re-validation).
+
+Usage (from backend/):
+    python -m app.scripts.benchmark.serialization_benchmark [--routes 1000] [--stops 250] [--repeat 20]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.responses import FastJSONResponse
+from app.schemas.route import RouteResponseWithStopsCount
+
+
+def make_listing(count: int, seed: int = 7) -> List[dict]:
+    # Rows as summary_to_dict returns them (Numeric capacity is a Decimal)
+    rng = random.Random(seed)
+    return [
+        {
+            "route_id": f"RouteID_{i:05d}",
+            "station_code": f"DLA{rng.randint(1, 9)}",
+            "date_YYYY_MM_DD": date(2018, 7, 1) + timedelta(days=rng.randint(0, 60)),
+            "departure_time_utc": dt_time(rng.randint(6, 18), rng.randint(0, 59)),
+            "stop_count": rng.randint(30, 250),
+            "executor_capacity_cm3": Decimal(f"{rng.randint(2_000_000, 4_000_000)}.00"),
+            "route_score": rng.choice(["High", "Medium", "Low"]),
+        }
+        for i in range(count)
+    ]
+
+
+def make_comparison(stops: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+
+    def sequence(key: str) -> List[dict]:
+        return [
+            {
+                "stop_code": f"S{i}",
+                key: i,
+                "lat": round(34.0 + rng.random() * 0.1, 6),
+                "lng": round(-118.3 + rng.random() * 0.1, 6),
+                "zone_id": f"Z-{rng.randint(1, 20)}",
+                "type": "Dropoff",
+            }
+            for i in range(stops)
+        ]
+
+    return {
+        "route": {
+            "route_id": "RouteID_00001",
+            "station_code": "DLA7",
+            "date_YYYY_MM_DD": date(2018, 7, 27),
+            "departure_time_utc": dt_time(15, 45),
+            "executor_capacity_cm3": 3313071.0,
+            "route_score": "High",
+        },
+        "planned_route": sequence("planned_sequence"),
+        "actual_route": sequence("actual_sequence"),
+        "metrics": {
+            "total_planned_distance_km": 117.05,
+            "total_actual_distance_km": 120.3,
+            "distance_delta_km": -3.25,
+            "distance_delta_percent": -2.7,
+            "order_matched_stops": 180,
+            "order_match_percentage": 72.0,
+            "prefix_match_count": 10,
+            "total_stops": stops,
+        },
+    }
+
+
+async def fastapi_default(content, field):
+    # What FastAPI does for a returned dict/list: validate against the
+    # response_model (if any), encode to JSON-able types, render with json.dumps
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", type=int, default=1000)
+    parser.add_argument("--stops", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    listing_field = create_response_field(name="Response", type_=List[RouteResponseWithStopsCount])
+    cases = [
+        (f"listing ({args.routes} routes)", make_listing(args.routes), listing_field),
+        (f"comparison ({args.stops} stops)", make_comparison(args.stops), None),
+    ]
+
+    print(f"{'payload':<26}{'default (ms)':>14}{'orjson (ms)':>14}{'speedup':>10}{'bytes':>10}")
+    for name, content, field in cases:
+        default_body = loop.run_until_complete(fastapi_default(content, field))
+        fast_body = FastJSONResponse(content).body
+        if default_body != fast_body:
+            print(f"⚠️  {name}: bodies differ")
+
+        default_ms = best_ms(lambda: loop.run_until_complete(fastapi_default(content, field)), args.repeat)
+        fast_ms = best_ms(lambda: FastJSONResponse(content), args.repeat)
+        print(f"{name:<26}{default_ms:>14.2f}{fast_ms:>14.2f}{default_ms / fast_ms:>9.1f}x{len(fast_body):>10}")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,7 @@ echo "Waiting for database..."
 sleep 5
 
 echo "Inserting mock data..."
-cd /app/app/scripts/mock
-python3 insert_route_metadata.py route_data.json
-python3 insert_actual_sequence_data.py actual_sequences.json
+cd /app
+python3 -m app.ingest --routes app/scripts/mock/route_data.json --actual app/scripts/mock/actual_sequences.json
 
 echo "Data insertion complete!"
\ No newline at end of file
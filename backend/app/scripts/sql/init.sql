@@ -67,7 +67,111 @@ CREATE TABLE route_metrics (
 
     total_stops INTEGER,
 
+    -- Order similarity: discordant pairs, Kendall tau in [-1, 1], longest
+    -- common subsequence and Levenshtein distance over the stop codes
+    kendall_tau_distance INTEGER,
+    kendall_tau DOUBLE PRECISION,
+    lcs_length INTEGER,
+    edit_distance INTEGER,
+
     generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
     CONSTRAINT unique_route_metrics UNIQUE (route_id)
-);
\ No newline at end of file
+);
+
+-- Newest metrics write: part of the analytics cache's data version
+CREATE INDEX idx_route_metrics_generated_at ON route_metrics(generated_at);
+
+-- Per-route listing data plus stop counts, so list endpoints never GROUP BY stops
+CREATE TABLE route_summary (
+    route_id VARCHAR(50) PRIMARY KEY REFERENCES routes(route_id) ON DELETE CASCADE,
+    station_code VARCHAR(10),
+    date_YYYY_MM_DD DATE,
+    departure_time_utc TIME,
+    executor_capacity_cm3 NUMERIC(10, 2),
+    route_score VARCHAR(10),
+    stop_count INTEGER NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Keyset pagination for GET /routes, with and without a station filter
+CREATE INDEX idx_route_summary_date_route ON route_summary(date_YYYY_MM_DD, route_id);
+CREATE INDEX idx_route_summary_station_date_route ON route_summary(station_code, date_YYYY_MM_DD, route_id);
+-- Newest summary refresh: part of the listing caches' data version
+CREATE INDEX idx_route_summary_refreshed_at ON route_summary(refreshed_at);
+
+-- Single-row global totals for the dashboard header
+CREATE TABLE route_totals (
+    id SMALLINT PRIMARY KEY CHECK (id = 1),
+    route_count BIGINT NOT NULL DEFAULT 0,
+    stop_count BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO route_totals (id, route_count, stop_count) VALUES (1, 0, 0);
+
+-- Recompute the summary rows for the given routes (all routes when NULL) and
+-- apply the difference to route_totals instead of recounting everything
+CREATE FUNCTION refresh_route_summary(ids VARCHAR[]) RETURNS VOID AS $$
+BEGIN
+    WITH fresh AS (
+        SELECT
+            r.route_id,
+            r.station_code,
+            r.date_YYYY_MM_DD,
+            r.departure_time_utc,
+            r.executor_capacity_cm3,
+            r.route_score,
+            COUNT(s.stop_id) AS stop_count
+        FROM routes r
+        LEFT JOIN stops s ON s.route_id = r.route_id
+        WHERE ids IS NULL OR r.route_id = ANY(ids)
+        GROUP BY r.route_id
+    ),
+    previous AS (
+        SELECT route_id, stop_count
+        FROM route_summary
+        WHERE ids IS NULL OR route_id = ANY(ids)
+    ),
+    upserted AS (
+        INSERT INTO route_summary (
+            route_id, station_code, date_YYYY_MM_DD, departure_time_utc,
+            executor_capacity_cm3, route_score, stop_count, refreshed_at
+        )
+        SELECT
+            route_id, station_code, date_YYYY_MM_DD, departure_time_utc,
+            executor_capacity_cm3, route_score, stop_count, CURRENT_TIMESTAMP
+        FROM fresh
+        ON CONFLICT (route_id) DO UPDATE SET
+            station_code = EXCLUDED.station_code,
+            date_YYYY_MM_DD = EXCLUDED.date_YYYY_MM_DD,
+            departure_time_utc = EXCLUDED.departure_time_utc,
+            executor_capacity_cm3 = EXCLUDED.executor_capacity_cm3,
+            route_score = EXCLUDED.route_score,
+            stop_count = EXCLUDED.stop_count,
+            refreshed_at = EXCLUDED.refreshed_at
+        RETURNING 1
+    )
+    UPDATE route_totals
+    SET
+        route_count = route_count
+            + (SELECT COUNT(*) FROM fresh)
+            - (SELECT COUNT(*) FROM previous),
+        stop_count = stop_count
+            + (SELECT COALESCE(SUM(stop_count), 0) FROM fresh)
+            - (SELECT COALESCE(SUM(stop_count), 0) FROM previous)
+    WHERE id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batches written by `python -m app.ingest --dir`, committed with the batch
+-- itself so a rerun skips exactly the work that already landed
+CREATE TABLE ingest_checkpoints (
+    source VARCHAR(500),
+    fingerprint VARCHAR(64),
+    batch_size INTEGER,
+    batch INTEGER,
+    routes INTEGER NOT NULL,
+    rows_written INTEGER NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, fingerprint, batch_size, batch)
+);
@@ -0,0 +1,11 @@
+-- Adds the indexes behind the shared cache's data versions to a database
+-- created before them (create_all doesn't add indexes to existing tables).
+-- Without them every listing and analytics request scans route_summary /
+-- route_metrics for its version. Safe to run more than once:
+--   psql -v ON_ERROR_STOP=1 -f app/scripts/sql/upgrade/cache_versions.sql
+
+-- Newest summary refresh: part of the listing caches' data version
+CREATE INDEX IF NOT EXISTS idx_route_summary_refreshed_at ON route_summary(refreshed_at);
+
+-- Newest metrics write: part of the analytics cache's data version
+CREATE INDEX IF NOT EXISTS idx_route_metrics_generated_at ON route_metrics(generated_at);
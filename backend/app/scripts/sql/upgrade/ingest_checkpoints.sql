@@ -0,0 +1,17 @@
+-- Adds ingest_checkpoints to a database created before it (init.sql only
+-- runs on an empty volume, and the table has no ORM model for create_all).
+-- `python -m app.ingest --dir` needs it. Safe to run more than once:
+--   psql -v ON_ERROR_STOP=1 -f app/scripts/sql/upgrade/ingest_checkpoints.sql
+
+-- Batches written by `python -m app.ingest --dir`, committed with the batch
+-- itself so a rerun skips exactly the work that already landed
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    source VARCHAR(500),
+    fingerprint VARCHAR(64),
+    batch_size INTEGER,
+    batch INTEGER,
+    routes INTEGER NOT NULL,
+    rows_written INTEGER NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, fingerprint, batch_size, batch)
+);
@@ -0,0 +1,95 @@
+-- Adds route_summary, route_totals and refresh_route_summary() to a database
+-- created before them (init.sql only runs on an empty volume, and the app's
+-- create_all makes the tables but not the function or the totals row).
+-- Safe to run more than once:
+--   psql -v ON_ERROR_STOP=1 -f app/scripts/sql/upgrade/route_summary.sql
+
+-- Per-route listing data plus stop counts, so list endpoints never GROUP BY stops
+CREATE TABLE IF NOT EXISTS route_summary (
+    route_id VARCHAR(50) PRIMARY KEY REFERENCES routes(route_id) ON DELETE CASCADE,
+    station_code VARCHAR(10),
+    date_YYYY_MM_DD DATE,
+    departure_time_utc TIME,
+    executor_capacity_cm3 NUMERIC(10, 2),
+    route_score VARCHAR(10),
+    stop_count INTEGER NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Keyset pagination for GET /routes, with and without a station filter
+CREATE INDEX IF NOT EXISTS idx_route_summary_date_route ON route_summary(date_YYYY_MM_DD, route_id);
+CREATE INDEX IF NOT EXISTS idx_route_summary_station_date_route ON route_summary(station_code, date_YYYY_MM_DD, route_id);
+
+-- Single-row global totals for the dashboard header
+CREATE TABLE IF NOT EXISTS route_totals (
+    id SMALLINT PRIMARY KEY CHECK (id = 1),
+    route_count BIGINT NOT NULL DEFAULT 0,
+    stop_count BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO route_totals (id, route_count, stop_count) VALUES (1, 0, 0)
+ON CONFLICT (id) DO NOTHING;
+
+-- Recompute the summary rows for the given routes (all routes when NULL) and
+-- apply the difference to route_totals instead of recounting everything
+CREATE OR REPLACE FUNCTION refresh_route_summary(ids VARCHAR[]) RETURNS VOID AS $$
+BEGIN
+    WITH fresh AS (
+        SELECT
+            r.route_id,
+            r.station_code,
+            r.date_YYYY_MM_DD,
+            r.departure_time_utc,
+            r.executor_capacity_cm3,
+            r.route_score,
+            COUNT(s.stop_id) AS stop_count
+        FROM routes r
+        LEFT JOIN stops s ON s.route_id = r.route_id
+        WHERE ids IS NULL OR r.route_id = ANY(ids)
+        GROUP BY r.route_id
+    ),
+    previous AS (
+        SELECT route_id, stop_count
+        FROM route_summary
+        WHERE ids IS NULL OR route_id = ANY(ids)
+    ),
+    upserted AS (
+        INSERT INTO route_summary (
+            route_id, station_code, date_YYYY_MM_DD, departure_time_utc,
+            executor_capacity_cm3, route_score, stop_count, refreshed_at
+        )
+        SELECT
+            route_id, station_code, date_YYYY_MM_DD, departure_time_utc,
+            executor_capacity_cm3, route_score, stop_count, CURRENT_TIMESTAMP
+        FROM fresh
+        ON CONFLICT (route_id) DO UPDATE SET
+            station_code = EXCLUDED.station_code,
+            date_YYYY_MM_DD = EXCLUDED.date_YYYY_MM_DD,
+            departure_time_utc = EXCLUDED.departure_time_utc,
+            executor_capacity_cm3 = EXCLUDED.executor_capacity_cm3,
+            route_score = EXCLUDED.route_score,
+            stop_count = EXCLUDED.stop_count,
+            refreshed_at = EXCLUDED.refreshed_at
+        RETURNING 1
+    )
+    UPDATE route_totals
+    SET
+        route_count = route_count
+            + (SELECT COUNT(*) FROM fresh)
+            - (SELECT COUNT(*) FROM previous),
+        stop_count = stop_count
+            + (SELECT COALESCE(SUM(stop_count), 0) FROM fresh)
+            - (SELECT COALESCE(SUM(stop_count), 0) FROM previous)
+    WHERE id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill every route, then recount the totals outright in case they were
+-- seeded against an already populated summary
+SELECT refresh_route_summary(NULL);
+
+UPDATE route_totals
+SET
+    route_count = (SELECT COUNT(*) FROM route_summary),
+    stop_count = (SELECT COALESCE(SUM(stop_count), 0) FROM route_summary)
+WHERE id = 1;
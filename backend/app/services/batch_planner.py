@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.request_metrics import record_planner_cpu
+from app.services.compact_route import CompactRoute
+from app.services.router_planner import PlannerMode, RoutePlanner
+
+
+WORKERS = os.cpu_count() or 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+# The batch endpoint runs on the threadpool: two first requests must not each
+# start a pool, or the lifespan hook only shuts one of them down
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Forking the multithreaded server process could copy a lock some other
+            # thread holds into the child; workers are forked from a clean,
+            # single-threaded forkserver instead, with the planner preloaded
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+            _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context)
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def plan_route(job: Tuple[str, CompactRoute, str, int]):
+    # A CompactRoute pickles as a few arrays and lists, so jobs are cheap to ship
+    route_id, stops, mode, improve_ms = job
+    started = time.process_time()
+    try:
+        planned_route = RoutePlanner(None, stops, mode=mode).generate_planned_route(improve_ms=improve_ms)
+    except ValueError as exc:
+        return route_id, None, str(exc), time.process_time() - started
+
+    # Only the sequence (and the worker's CPU time) travels back; coordinates
+    # are already in the parent
+    sequence = [(stop["stop_code"], stop["planned_sequence"]) for stop in planned_route]
+    return route_id, sequence, None, time.process_time() - started
+
+
+def plan_routes(
+    stops_by_route: Dict[str, CompactRoute],
+    mode: PlannerMode = PlannerMode.MATRIX,
+    improve_ms: int = 0,
+) -> Tuple[Dict[str, List[tuple]], Dict[str, str]]:
+    """Plan many routes in parallel; returns (sequences by route, errors by route)."""
+    jobs = [(route_id, stops, PlannerMode(mode).value, improve_ms) for route_id, stops in stops_by_route.items()]
+    if not jobs:
+        return {}, {}
+
+    chunksize = max(1, len(jobs) // (WORKERS * 4))
+
+    planned, failed = {}, {}
+    cpu_seconds = 0.0
+    for route_id, sequence, error, cpu in get_executor().map(plan_route, jobs, chunksize=chunksize):
+        cpu_seconds += cpu
+        if error is None:
+            planned[route_id] = sequence
+        else:
+            failed[route_id] = error
+
+    record_planner_cpu(cpu_seconds)
+    return planned, failed
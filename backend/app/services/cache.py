@@ -0,0 +1,154 @@
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import inspect as sa_inspect
+
+from app.core.config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    Entries can carry a version: a lookup that asks for a different version
+    misses, as if the entry had expired.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Hashable, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None, version: Hashable = None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now or (version is not None and entry[1] != version):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key: Hashable, value: Any, version: Hashable = None) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits_total": self.hits,
+            "misses_total": self.misses,
+            "evictions_total": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _detach(db, value):
+    # Cached ORM objects outlive the session that loaded them: expunge them so a
+    # later commit on that session can't expire their attributes
+    for obj in value if isinstance(value, list) else (value,):
+        if sa_inspect(obj, raiseerr=False) is not None:
+            db.expunge(obj)
+    return value
+
+
+# (route_id, version) of the route the current request serves, set by the
+# ETag dependency from the database (see api/etag.py). Other workers and the
+# ingest CLI write without touching this process's caches; checking entries
+# against the live version keeps their writes from being hidden until expiry.
+current_route_version: ContextVar[tuple[str, Hashable] | None] = ContextVar("current_route_version", default=None)
+
+
+def _route_version(args: tuple) -> Hashable:
+    current = current_route_version.get()
+    if current is not None and args and args[0] == current[0]:
+        return current[1]
+    return None
+
+
+def cached(cache: TTLCache) -> Callable:
+    """
+    Cache a repository function `fn(db, *args)` on `args` (the session is not
+    part of the key). Works for sync and async functions; None is not cached so
+    routes ingested after a miss are picked up. When the request knows the
+    route's version, entries stored under any other version are reloaded.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(db, *args):
+                version = _route_version(args)
+                value = cache.get(args, _MISSING, version)
+                if value is _MISSING:
+                    value = await fn(db, *args)
+                    if value is not None:
+                        cache.set(args, _detach(db, value), version)
+                return value
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(db, *args):
+            version = _route_version(args)
+            value = cache.get(args, _MISSING, version)
+            if value is _MISSING:
+                value = fn(db, *args)
+                if value is not None:
+                    cache.set(args, _detach(db, value), version)
+            return value
+        return wrapper
+
+    return decorator
+
+
+# One cache per entity, keyed by route_id and shared by the sync and async
+# repositories. Metrics are invalidated in this process when saved. Writes
+# from elsewhere (other workers, the ingest CLI) are caught by the version
+# check on ETag'd reads; other reads rely on the TTL.
+route_cache = TTLCache("route", settings.CACHE_MAX_ENTRIES, settings.CACHE_ROUTE_TTL)
+stops_cache = TTLCache("stops", settings.CACHE_MAX_ENTRIES, settings.CACHE_ROUTE_TTL)
+compact_route_cache = TTLCache("compact_route", settings.CACHE_MAX_ENTRIES, settings.CACHE_ROUTE_TTL)
+route_metric_cache = TTLCache("route_metric", settings.CACHE_MAX_ENTRIES, settings.CACHE_DERIVED_TTL)
+actual_sequence_cache = TTLCache("actual_sequence", settings.CACHE_MAX_ENTRIES, settings.CACHE_ACTUAL_TTL)
+
+caches = {
+    cache.name: cache
+    for cache in (
+        route_cache,
+        stops_cache,
+        compact_route_cache,
+        route_metric_cache,
+        actual_sequence_cache,
+    )
+}
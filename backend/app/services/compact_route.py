@@ -0,0 +1,71 @@
+import sys
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return None if value is None else sys.intern(value)
+
+
+class CompactRoute:
+    """
+    One route's stops in columnar form: parallel float64 coordinate arrays
+    plus interned stop codes, types and zone ids (repeated across stops and
+    routes, so each distinct string is stored once). Picklable, so it can be
+    shipped to planner worker processes as-is.
+    """
+
+    __slots__ = ("route_id", "stop_codes", "lat", "lng", "types", "zone_ids")
+
+    def __init__(
+        self,
+        route_id: Optional[str],
+        stop_codes: List[str],
+        lat: np.ndarray,
+        lng: np.ndarray,
+        types: List[str],
+        zone_ids: List[Optional[str]],
+    ):
+        self.route_id = route_id
+        self.stop_codes = stop_codes
+        self.lat = lat
+        self.lng = lng
+        self.types = types
+        self.zone_ids = zone_ids
+
+    @classmethod
+    def from_rows(cls, route_id: Optional[str], rows: Sequence[tuple]) -> "CompactRoute":
+        # rows of (stop_code, lat, lng, type, zone_id), as the column queries return them
+        count = len(rows)
+        lat = np.empty(count, dtype=np.float64)
+        lng = np.empty(count, dtype=np.float64)
+        stop_codes, types, zone_ids = [], [], []
+
+        for index, (stop_code, stop_lat, stop_lng, stop_type, zone_id) in enumerate(rows):
+            stop_codes.append(sys.intern(stop_code))
+            lat[index] = stop_lat
+            lng[index] = stop_lng
+            types.append(_intern(stop_type))
+            zone_ids.append(_intern(zone_id))
+
+        return cls(route_id, stop_codes, lat, lng, types, zone_ids)
+
+    @classmethod
+    def from_stops(cls, route_id: Optional[str], stops: Sequence) -> "CompactRoute":
+        # From ORM stops or anything else with the same attributes
+        return cls.from_rows(route_id, [(s.stop_code, s.lat, s.lng, s.type, s.zone_id) for s in stops])
+
+    def __len__(self) -> int:
+        return len(self.stop_codes)
+
+    def take(self, indices: Sequence[int]) -> "CompactRoute":
+        indices = list(indices)
+        return CompactRoute(
+            self.route_id,
+            [self.stop_codes[i] for i in indices],
+            self.lat[indices],
+            self.lng[indices],
+            [self.types[i] for i in indices],
+            [self.zone_ids[i] for i in indices],
+        )
@@ -0,0 +1,98 @@
+from typing import Sequence
+
+import numpy as np
+
+from app.services.compact_route import CompactRoute
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_matrix(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    # Full pairwise great-circle distances (km) in a single batched pass
+    lat = np.radians(lat)
+    lng = np.radians(lng)
+
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat)[:, None]
+        * np.cos(lat)[None, :]
+        * np.sin(dlng / 2) ** 2
+    )
+    np.clip(a, 0.0, 1.0, out=a)
+
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def haversine_path(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    # Distances (km) between consecutive points only: len(lat) - 1 legs
+    lat = np.radians(lat)
+    lng = np.radians(lng)
+
+    dlat = np.diff(lat)
+    dlng = np.diff(lng)
+
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lat[:-1])
+        * np.cos(lat[1:])
+        * np.sin(dlng / 2) ** 2
+    )
+    np.clip(a, 0.0, 1.0, out=a)
+
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def coordinates(stops: Sequence) -> tuple[np.ndarray, np.ndarray]:
+    # Accepts a CompactRoute, ORM stops or the stop dicts built by the repository
+    if isinstance(stops, CompactRoute):
+        return stops.lat, stops.lng
+    if stops and isinstance(stops[0], dict):
+        lat = (s["lat"] for s in stops)
+        lng = (s["lng"] for s in stops)
+    else:
+        lat = (s.lat for s in stops)
+        lng = (s.lng for s in stops)
+
+    return (
+        np.fromiter(map(float, lat), dtype=np.float64, count=len(stops)),
+        np.fromiter(map(float, lng), dtype=np.float64, count=len(stops)),
+    )
+
+
+class DistanceMatrix:
+    """Pairwise haversine distances for one route, indexed by stop position."""
+
+    def __init__(self, lat: Sequence[float], lng: Sequence[float]):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.matrix = haversine_matrix(self.lat, self.lng)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def nearest(self, origin: int, visited: np.ndarray) -> int:
+        row = np.where(visited, np.inf, self.matrix[origin])
+        return int(row.argmin())
+
+    def nearest_neighbour_order(self, start: int = 0) -> list[int]:
+        n = len(self)
+        visited = np.zeros(n, dtype=bool)
+        visited[start] = True
+
+        order = [start]
+        current = start
+        for _ in range(n - 1):
+            current = self.nearest(current, visited)
+            visited[current] = True
+            order.append(current)
+
+        return order
+
+    def path_length(self, order: Sequence[int]) -> float:
+        if len(order) < 2:
+            return 0.0
+        order = np.asarray(order)
+        return float(self.matrix[order[:-1], order[1:]].sum())
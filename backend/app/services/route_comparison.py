@@ -0,0 +1,147 @@
+from typing import List, Sequence
+
+import numpy as np
+
+from app.services.distance_matrix import haversine_path
+from app.services.sequence_metrics import SEQUENCE_METRIC_FIELDS, sequence_similarity
+
+# A route sequence in columnar form, as returned by the comparison query:
+# {"stop_code": [...], "sequence": [...], "lat": [...], "lng": [...], "zone_id": [...], "type": [...]}
+SEQUENCE_COLUMNS = ("stop_code", "sequence", "lat", "lng", "zone_id", "type")
+
+# Columns of route_metrics produced by compute_route_metrics
+METRIC_FIELDS = (
+    "total_planned_distance_km",
+    "total_actual_distance_km",
+    "distance_delta_km",
+    "distance_delta_percent",
+    "order_matched_stops",
+    "order_match_percentage",
+    "prefix_match_count",
+    "total_stops",
+    *SEQUENCE_METRIC_FIELDS,
+)
+
+
+def empty_sequence() -> dict:
+    return {column: [] for column in SEQUENCE_COLUMNS}
+
+
+def path_distances_km(paths: Sequence[tuple]) -> np.ndarray:
+    """Lengths (km) of many (lat, lng) paths from one haversine pass over all their points."""
+    lengths = np.fromiter((len(lat) for lat, _ in paths), dtype=np.int64, count=len(paths))
+    totals = np.zeros(len(paths), dtype=np.float64)
+    routed = lengths >= 2
+    if not routed.any():
+        return totals
+
+    lat = np.concatenate([np.asarray(lat, dtype=np.float64) for (lat, _), keep in zip(paths, routed) if keep])
+    lng = np.concatenate([np.asarray(lng, dtype=np.float64) for (_, lng), keep in zip(paths, routed) if keep])
+    starts = np.concatenate(([0], np.cumsum(lengths[routed])[:-1]))
+
+    # legs[i] joins point i to i + 1; the leg out of each path's last point
+    # lands on the next path's first point, so zero it before summing per path
+    legs = np.append(haversine_path(lat, lng), 0.0)
+    legs[starts[1:] - 1] = 0.0
+    totals[routed] = np.add.reduceat(legs, starts)
+    return totals
+
+
+def path_distance_km(lat: Sequence[float], lng: Sequence[float]) -> float:
+    return round(float(path_distances_km([(lat, lng)])[0]), 2)
+
+
+def order_matches(planned_codes: Sequence[str], actual_codes: Sequence[str]) -> tuple[int, float]:
+    length = min(len(planned_codes), len(actual_codes))
+    matches = sum(1 for p, a in zip(planned_codes, actual_codes) if p == a)
+    return matches, round((matches / length) * 100, 2) if length else 0.0
+
+
+def prefix_matches(planned_codes: Sequence[str], actual_codes: Sequence[str], cap: int = 10) -> int:
+    matches = 0
+    for p, a in zip(planned_codes[:cap], actual_codes[:cap]):
+        if p != a:
+            break
+        matches += 1
+    return matches
+
+
+def metrics_from_distances(planned: dict, actual: dict, planned_km: float, actual_km: float) -> dict:
+    matched, match_percentage = order_matches(planned["stop_code"], actual["stop_code"])
+
+    return {
+        "total_planned_distance_km": planned_km,
+        "total_actual_distance_km": actual_km,
+        "distance_delta_km": round(planned_km - actual_km, 2),
+        "distance_delta_percent": round(((planned_km - actual_km) / actual_km * 100) if actual_km else 0, 2),
+        "order_matched_stops": matched,
+        "order_match_percentage": match_percentage,
+        "prefix_match_count": prefix_matches(planned["stop_code"], actual["stop_code"]),
+        "total_stops": len(planned["stop_code"]),
+        **sequence_similarity(planned["stop_code"], actual["stop_code"]),
+    }
+
+
+def compute_route_metrics(planned: dict, actual: dict) -> dict:
+    planned_km = path_distance_km(planned["lat"], planned["lng"])
+    actual_km = path_distance_km(actual["lat"], actual["lng"])
+    return metrics_from_distances(planned, actual, planned_km, actual_km)
+
+
+def compute_route_metrics_bulk(sequences: dict[str, tuple[dict, dict]]) -> dict[str, dict]:
+    # {route_id: (planned, actual)}; distances for every route come from two
+    # vectorised passes instead of one per route and sequence
+    pairs = list(sequences.values())
+    planned_kms = path_distances_km([(planned["lat"], planned["lng"]) for planned, _ in pairs])
+    actual_kms = path_distances_km([(actual["lat"], actual["lng"]) for _, actual in pairs])
+
+    return {
+        route_id: metrics_from_distances(planned, actual, round(float(planned_km), 2), round(float(actual_km), 2))
+        for (route_id, (planned, actual)), planned_km, actual_km in zip(sequences.items(), planned_kms, actual_kms)
+    }
+
+
+def comparison_metrics(comparison: dict) -> dict:
+    # Serve the stored row while it is newer than both sequences; otherwise
+    # compute in memory so reads never write
+    if comparison["metrics_fresh"]:
+        return {field: getattr(comparison["metrics"], field) for field in METRIC_FIELDS}
+    return compute_route_metrics(comparison["planned"], comparison["actual"])
+
+
+def sequence_rows(columns: dict, sequence_key: str) -> List[dict]:
+    # Expand the columnar sequence into the per-stop dicts the API returns
+    return [
+        {
+            "stop_code": stop_code,
+            sequence_key: sequence,
+            "lat": lat,
+            "lng": lng,
+            "zone_id": zone_id,
+            "type": stop_type,
+        }
+        for stop_code, sequence, lat, lng, zone_id, stop_type in zip(
+            *(columns[column] for column in SEQUENCE_COLUMNS)
+        )
+    ]
+
+
+def comparison_payload(comparison: dict) -> dict:
+    # Body of GET /routes/{route_id}/comparison, and one line of the NDJSON export
+    return {
+        "route": route_header(comparison["route"]),
+        "planned_route": sequence_rows(comparison["planned"], "planned_sequence"),
+        "actual_route": sequence_rows(comparison["actual"], "actual_sequence"),
+        "metrics": comparison_metrics(comparison),
+    }
+
+
+def route_header(route) -> dict:
+    return {
+        "route_id": route.route_id,
+        "station_code": route.station_code,
+        "date_YYYY_MM_DD": route.date_YYYY_MM_DD,
+        "departure_time_utc": route.departure_time_utc,
+        "executor_capacity_cm3": float(route.executor_capacity_cm3),
+        "route_score": route.route_score,
+    }
@@ -0,0 +1,287 @@
+import math
+import time
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.distance_matrix import EARTH_RADIUS_KM, haversine_matrix
+from app.services.spatial_index import neighbour_lists, unit_vectors
+
+# A stage makes one pass of moves over the tour in place and reports whether
+# it found an improvement. Stages only ever apply moves with a negative delta,
+# so the tour held at any point is the best one found so far.
+ImprovementStage = Callable[[List[int], List[List[float]], float], bool]
+
+EPSILON = 1e-9
+
+# Above this many stops the dense matrix (n² floats, copied again into Python
+# lists for the stages) costs more time and memory than the budget buys, so
+# the search runs over nearest-neighbour candidate lists instead
+DENSE_LIMIT = 1000
+NEIGHBOURS = 10
+
+
+def two_opt(tour: List[int], dist: List[List[float]], deadline: float) -> bool:
+    # Reverse tour[i..j]; position 0 (the station) stays fixed and the path is
+    # open, so the last stop has no outgoing leg
+    n = len(tour)
+    improved = False
+
+    for i in range(1, n - 1):
+        if time.perf_counter() > deadline:
+            break
+
+        prev, first = tour[i - 1], tour[i]
+        row_prev, row_first = dist[prev], dist[first]
+
+        for j in range(i + 1, n):
+            last = tour[j]
+            delta = row_prev[last] - row_prev[first]
+            if j + 1 < n:
+                nxt = tour[j + 1]
+                delta += row_first[nxt] - dist[last][nxt]
+
+            if delta < -EPSILON:
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                improved = True
+                prev, first = tour[i - 1], tour[i]
+                row_prev, row_first = dist[prev], dist[first]
+
+    return improved
+
+
+def or_opt(tour: List[int], dist: List[List[float]], deadline: float, max_segment: int = 3) -> bool:
+    # Move a run of 1..max_segment stops elsewhere in the tour, optionally reversed
+    n = len(tour)
+    improved = False
+
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length <= n:
+            if time.perf_counter() > deadline:
+                return improved
+
+            head, tail = tour[i], tour[i + length - 1]
+            prev = tour[i - 1]
+            nxt = tour[i + length] if i + length < n else None
+
+            removal_gain = dist[prev][head]
+            if nxt is not None:
+                removal_gain += dist[tail][nxt] - dist[prev][nxt]
+
+            best_delta, best_move = -EPSILON, None
+            for p in range(n):
+                # Insert between tour[p] and tour[p + 1]; skip edges touching the segment
+                if i - 1 <= p < i + length:
+                    continue
+                u = tour[p]
+                v = tour[p + 1] if p + 1 < n else None
+
+                base = -dist[u][v] if v is not None else 0.0
+                forward = dist[u][head] + (dist[tail][v] if v is not None else 0.0) + base
+                backward = dist[u][tail] + (dist[head][v] if v is not None else 0.0) + base
+
+                if forward - removal_gain < best_delta:
+                    best_delta, best_move = forward - removal_gain, (p, False)
+                if backward - removal_gain < best_delta:
+                    best_delta, best_move = backward - removal_gain, (p, True)
+
+            if best_move is None:
+                i += 1
+                continue
+
+            p, reverse = best_move
+            segment = tour[i:i + length]
+            if reverse:
+                segment.reverse()
+            rest = tour[:i] + tour[i + length:]
+            at = p + 1 if p < i else p + 1 - length
+            tour[:] = rest[:at] + segment + rest[at:]
+            improved = True
+
+    return improved
+
+
+DEFAULT_STAGES: Sequence[ImprovementStage] = (two_opt, or_opt)
+
+
+def improve_route(
+    order: Sequence[int],
+    matrix: np.ndarray,
+    budget_ms: float,
+    stages: Sequence[ImprovementStage] = DEFAULT_STAGES,
+) -> List[int]:
+    """Run local-search stages over ``order`` until none improves or the budget runs out."""
+    tour = list(order)
+    if budget_ms <= 0 or len(tour) < 4:
+        return tour
+
+    return run_stages(tour, matrix, time.perf_counter() + budget_ms / 1000, stages)
+
+
+def run_stages(tour: List[int], matrix: np.ndarray, deadline: float, stages: Sequence[ImprovementStage]) -> List[int]:
+    # Python lists make the O(1) delta lookups much cheaper than ndarray indexing
+    dist = matrix.tolist()
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for stage in stages:
+            improved |= stage(tour, dist, deadline)
+
+    return tour
+
+
+class NeighbourDistances:
+    """Candidate lists plus on-demand great-circle distances, for tours too large for a dense matrix."""
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, k: int = NEIGHBOURS):
+        self.points = unit_vectors(np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)).tolist()
+        self.neighbours = neighbour_lists(lat, lng, k)
+
+    def distance(self, a: int, b: Optional[int]) -> float:
+        # Open path: the leg after the last stop (None) costs nothing
+        if b is None:
+            return 0.0
+        ax, ay, az = self.points[a]
+        bx, by, bz = self.points[b]
+        chord = math.sqrt((ax - bx) ** 2 + (ay - by) ** 2 + (az - bz) ** 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _reverse(tour: List[int], position: List[int], i: int, j: int) -> None:
+    tour[i:j + 1] = tour[i:j + 1][::-1]
+    for k in range(i, j + 1):
+        position[tour[k]] = k
+
+
+def two_opt_neighbours(tour: List[int], position: List[int], dist: NeighbourDistances, deadline: float) -> bool:
+    # 2-opt that only tries new edges from a stop to one of its neighbours
+    # closer than its current successor (any improving move has such an edge)
+    d = dist.distance
+    n = len(tour)
+    improved = False
+
+    for p in range(n - 1):
+        if time.perf_counter() > deadline:
+            break
+
+        a, succ = tour[p], tour[p + 1]
+        current = d(a, succ)
+        for c in dist.neighbours[a]:
+            to_c = d(a, c)
+            if to_c >= current:
+                break
+            q = position[c]
+            if q > p + 1:
+                # (a, succ) + (c, after c) -> (a, c) + (succ, after c)
+                after = tour[q + 1] if q + 1 < n else None
+                delta = to_c + d(succ, after) - current - d(c, after)
+                start, end = p + 1, q
+            elif q < p:
+                # (c, after c) + (a, succ) -> (c, a) + (after c, succ)
+                after = tour[q + 1]
+                delta = to_c + d(after, succ) - d(c, after) - current
+                start, end = q + 1, p
+            else:
+                continue
+
+            if delta < -EPSILON:
+                _reverse(tour, position, start, end)
+                improved = True
+                break
+
+    return improved
+
+
+def or_opt_neighbours(
+    tour: List[int],
+    position: List[int],
+    dist: NeighbourDistances,
+    deadline: float,
+    max_segment: int = 3,
+) -> bool:
+    # Or-opt that only tries inserting a segment next to a neighbour of its ends
+    d = dist.distance
+    n = len(tour)
+    improved = False
+
+    for length in range(1, max_segment + 1):
+        i = 1
+        while i + length <= n:
+            if time.perf_counter() > deadline:
+                return improved
+
+            head, tail = tour[i], tour[i + length - 1]
+            prev = tour[i - 1]
+            nxt = tour[i + length] if i + length < n else None
+            removal_gain = d(prev, head) + d(tail, nxt) - d(prev, nxt)
+
+            best_delta, best_move = -EPSILON, None
+            for c in dist.neighbours[head] + dist.neighbours[tail]:
+                q = position[c]
+                for p in (q - 1, q):
+                    if p < 0 or i - 1 <= p < i + length:
+                        continue
+                    u = tour[p]
+                    v = tour[p + 1] if p + 1 < n else None
+
+                    base = -d(u, v)
+                    forward = d(u, head) + d(tail, v) + base - removal_gain
+                    backward = d(u, tail) + d(head, v) + base - removal_gain
+                    if forward < best_delta:
+                        best_delta, best_move = forward, (p, False)
+                    if backward < best_delta:
+                        best_delta, best_move = backward, (p, True)
+
+            if best_move is None:
+                i += 1
+                continue
+
+            p, reverse = best_move
+            segment = tour[i:i + length]
+            if reverse:
+                segment.reverse()
+            rest = tour[:i] + tour[i + length:]
+            at = p + 1 if p < i else p + 1 - length
+            tour[:] = rest[:at] + segment + rest[at:]
+            for k in range(min(i, at), max(i, at) + length):
+                position[tour[k]] = k
+            improved = True
+
+    return improved
+
+
+def improve_tour(
+    order: Sequence[int],
+    lat: np.ndarray,
+    lng: np.ndarray,
+    budget_ms: float,
+    matrix: Optional[np.ndarray] = None,
+) -> List[int]:
+    """
+    Improve ``order`` over the stops at ``lat``/``lng`` within ``budget_ms``.
+    Building the distance lookup counts against the budget: small tours use
+    ``matrix`` (built here if not given), larger ones neighbour lists.
+    """
+    tour = list(order)
+    if budget_ms <= 0 or len(tour) < 4:
+        return tour
+
+    deadline = time.perf_counter() + budget_ms / 1000
+    if len(tour) <= DENSE_LIMIT:
+        if matrix is None:
+            matrix = haversine_matrix(lat, lng)
+        return run_stages(tour, matrix, deadline, DEFAULT_STAGES)
+
+    dist = NeighbourDistances(lat, lng)
+    position = [0] * len(tour)
+    for index, stop in enumerate(tour):
+        position[stop] = index
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = two_opt_neighbours(tour, position, dist, deadline)
+        improved |= or_opt_neighbours(tour, position, dist, deadline)
+
+    return tour
@@ -1,96 +1,87 @@
-import math
-from typing import List, Tuple
+from enum import Enum
+from typing import List
 from app.models.stops import Stop
 from app.models.routes import Route
+from app.services.compact_route import CompactRoute
+from app.services.distance_matrix import DistanceMatrix, coordinates, haversine_path
+from app.services.route_comparison import order_matches, prefix_matches
+from app.services.route_improvement import improve_tour
+from app.services.spatial_index import UnitSphereKDTree
+from app.services.zone_planner import zone_order
+
+
+class PlannerMode(str, Enum):
+    MATRIX = "matrix"    # dense pairwise matrix, best for typical 150-250 stop routes
+    KDTREE = "kdtree"    # spatial index with deletion, for routes with thousands of stops
+    ZONE = "zone"        # order zones first, then sequence stops within each zone
 
 
 class RoutePlanner:
-    def __init__(self, route: Route, stops: List[Stop]):
+    def __init__(self, route: Route, stops: CompactRoute | List[Stop], mode: PlannerMode = PlannerMode.MATRIX):
         self.route = route
+        # Everything below works on float64 arrays; ORM stops are converted once
+        if not isinstance(stops, CompactRoute):
+            stops = CompactRoute.from_stops(getattr(route, "route_id", None), stops)
         self.stops = stops
+        self.mode = PlannerMode(mode)
         self.station = None
         self.dropoffs = []
 
     # ----------------------------
-    # Helpers
+    # Core Logic
     # ----------------------------
 
-    @staticmethod
-    def haversine(lat1, lon1, lat2, lon2) -> float:
-        R = 6371  # Earth radius in KM
-
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
+    def seperate_station_and_dropoffs(self) -> CompactRoute:
+        # Indices into self.stops; returns the route reordered station-first
+        for index, stop_type in enumerate(self.stops.types):
+            if stop_type.lower() == "station":
+                self.station = index
+            else:
+                self.dropoffs.append(index)
 
-        a = (
-            math.sin(dlat / 2) ** 2
-            + math.cos(math.radians(lat1))
-            * math.cos(math.radians(lat2))
-            * math.sin(dlon / 2) ** 2
-        )
+        if self.station is None:
+            raise ValueError("No station found in route")
 
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        return self.stops.take([self.station] + self.dropoffs)
 
-    # ----------------------------
-    # Core Logic
-    # ----------------------------
+    def generate_planned_route(self, improve_ms: int = 0) -> List[dict]:
+        stops = self.seperate_station_and_dropoffs()
 
-    def seperate_station_and_dropoffs(self) -> Tuple[Stop, List[Stop]]:
-        for stop in self.stops:
-            if stop.type.lower() == "station":
-                self.station = stop
-            else:
-                self.dropoffs.append(stop)
+        # Zone mode only builds small per-zone matrices and improves inside each zone
+        if self.mode == PlannerMode.ZONE:
+            return self.build_planned_route(stops, zone_order(stops, improve_ms=improve_ms))
 
-        if not self.station:
-            raise ValueError("No station found in route")
+        # Station is index 0 in both the matrix and the spatial index
+        matrix = None
+        if self.mode == PlannerMode.KDTREE:
+            order = UnitSphereKDTree(stops.lat, stops.lng).nearest_neighbour_order(start=0)
+        else:
+            matrix = DistanceMatrix(stops.lat, stops.lng)
+            order = matrix.nearest_neighbour_order(start=0)
 
-        return self.station, self.dropoffs
-
-    def generate_planned_route(self) -> List[dict]:
-        station, dropoffs = self.seperate_station_and_dropoffs()
-
-        planned_route = []
-        current = station
-        remaining = dropoffs.copy()
-        sequence = 1
-
-        while remaining:
-            nearest = min(
-                remaining,
-                key=lambda stop: self.haversine(
-                    current.lat,
-                    current.lng,
-                    stop.lat,
-                    stop.lng,
-                ),
+        # Optional local search (2-opt / Or-opt) within a wall-clock budget,
+        # which includes building whatever distance lookup it needs
+        if improve_ms > 0:
+            order = improve_tour(
+                order, stops.lat, stops.lng, improve_ms, matrix=None if matrix is None else matrix.matrix
             )
 
-            planned_route.append({
-                "stop_code": nearest.stop_code,
+        return self.build_planned_route(stops, order)
+
+    @staticmethod
+    def build_planned_route(stops: CompactRoute, order: List[int]) -> List[dict]:
+        lat, lng = stops.lat.tolist(), stops.lng.tolist()
+        return [
+            {
+                "stop_code": stops.stop_codes[index],
                 "planned_sequence": sequence,
-                "lat": nearest.lat,
-                "lng": nearest.lng,
-                "zone_id": nearest.zone_id,
-                "type": nearest.type,
-            })
-
-            sequence += 1
-            remaining.remove(nearest)
-            current = nearest
-
-        # Add station at the beginning
-        planned_route.insert(0, {
-            "stop_code": station.stop_code,
-            "planned_sequence": 0,
-            "lat": station.lat,
-            "lng": station.lng,
-            "zone_id": station.zone_id,
-            "type": station.type,
-        })
-
-        return planned_route
+                "lat": lat[index],
+                "lng": lng[index],
+                "zone_id": stops.zone_ids[index],
+                "type": stops.types[index],
+            }
+            for sequence, index in enumerate(order)
+        ]
 
     # ----------------------------
     # Metrics
@@ -98,37 +89,23 @@ class RoutePlanner:
 
     @staticmethod
     def total_route_distance(stops: List[dict]) -> float:
-        total = 0.0
+        if len(stops) < 2:
+            return 0.0
 
-        for i in range(len(stops) - 1):
-            s1, s2 = stops[i], stops[i + 1]
-            total += RoutePlanner.haversine(
-                s1["lat"], s1["lng"],
-                s2["lat"], s2["lng"]
-            )
-
-        return round(total, 2)
+        lat, lng = coordinates(stops)
+        return round(float(haversine_path(lat, lng).sum()), 2)
 
     @staticmethod
     def order_match_percentage(planned: List[dict], actual: List[dict]) -> float:
-        matches = 0
-        length = min(len(planned), len(actual))
-
-        for i in range(length):
-            if planned[i]["stop_code"] == actual[i]["stop_code"]:
-                matches += 1
-
-        return matches, round((matches / length) * 100, 2) if length else 0.0
+        return order_matches(
+            [stop["stop_code"] for stop in planned],
+            [stop["stop_code"] for stop in actual],
+        )
 
     @staticmethod
     def prefix_match_count(planned: List[dict], actual: List[dict], cap: int = 10) -> int:
-        matches = 0
-        length = min(len(planned), len(actual), cap)
-
-        for i in range(length):
-            if planned[i]["stop_code"] == actual[i]["stop_code"]:
-                matches += 1
-            else:
-                break
-
-        return matches
+        return prefix_matches(
+            [stop["stop_code"] for stop in planned],
+            [stop["stop_code"] for stop in actual],
+            cap=cap,
+        )
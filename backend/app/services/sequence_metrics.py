@@ -0,0 +1,116 @@
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+# Order-similarity metrics between a planned and an actual stop sequence.
+#
+# Stop codes are unique within a route, so each sequence is a permutation of
+# its stops. Codes are interned to integers by planned position: the planned
+# sequence becomes 0..n-1, and the actual sequence becomes the planned
+# position of each of its stops. Every metric then works on small ints:
+#   - Kendall tau distance: inversions in the actual positions, O(n log n)
+#   - longest common subsequence: longest increasing run of them, O(n log n)
+#   - edit distance: bit-parallel Levenshtein (Myers/Hyyrö), O(n) big-int ops
+# so the whole suite stays cheap enough to recompute for every route in bulk.
+
+SEQUENCE_METRIC_FIELDS = ("kendall_tau_distance", "kendall_tau", "lcs_length", "edit_distance")
+
+
+def intern_positions(planned_codes: Sequence[str], actual_codes: Sequence[str]) -> Tuple[int, List[int]]:
+    # (len(planned), actual stops as planned positions); stops missing from the
+    # plan get ids past the end, so they never match
+    positions = {code: index for index, code in enumerate(planned_codes)}
+    missing = len(planned_codes)
+    actual = []
+    for code in actual_codes:
+        position = positions.get(code)
+        if position is None:
+            position = missing
+            missing += 1
+        actual.append(position)
+    return len(planned_codes), actual
+
+
+def count_inversions(values: List[int]) -> int:
+    # Bottom-up merge sort, counting the pairs each merge moves past each other
+    values = list(values)
+    buffer = [0] * len(values)
+    inversions = 0
+    width = 1
+    while width < len(values):
+        for start in range(0, len(values), 2 * width):
+            middle = min(start + width, len(values))
+            end = min(start + 2 * width, len(values))
+            left, right, out = start, middle, start
+            while left < middle and right < end:
+                if values[right] < values[left]:
+                    buffer[out] = values[right]
+                    inversions += middle - left
+                    right += 1
+                else:
+                    buffer[out] = values[left]
+                    left += 1
+                out += 1
+            buffer[out:end] = values[left:middle] if left < middle else values[right:end]
+        values, buffer = buffer, values
+        width *= 2
+    return inversions
+
+
+def longest_increasing_length(values: Sequence[int]) -> int:
+    # Patience sorting: tails[k] is the smallest tail of an increasing run of length k + 1
+    tails: List[int] = []
+    for value in values:
+        index = bisect_left(tails, value)
+        if index == len(tails):
+            tails.append(value)
+        else:
+            tails[index] = value
+    return len(tails)
+
+
+def edit_distance(planned_length: int, actual: Sequence[int]) -> int:
+    # Levenshtein distance between 0..planned_length-1 and `actual`. The
+    # planned sequence is the pattern; stop i matches only at bit i, so the
+    # per-symbol match masks are just 1 << i.
+    if planned_length == 0:
+        return len(actual)
+
+    full = (1 << planned_length) - 1
+    last = 1 << (planned_length - 1)
+    positive, negative = full, 0
+    distance = planned_length
+
+    for position in actual:
+        match = 1 << position if position < planned_length else 0
+        vertical = match | negative
+        horizontal = ((((match & positive) + positive) & full) ^ positive) | match
+        horizontal_positive = negative | (~(horizontal | positive) & full)
+        horizontal_negative = positive & horizontal
+
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & full)
+        negative = horizontal_positive & vertical
+
+    return distance
+
+
+def sequence_similarity(planned_codes: Sequence[str], actual_codes: Sequence[str]) -> dict:
+    planned_length, actual = intern_positions(planned_codes, actual_codes)
+
+    # Kendall tau is only defined over the stops both sequences visit
+    common = [position for position in actual if position < planned_length]
+    discordant = count_inversions(common)
+    pairs = len(common) * (len(common) - 1) // 2
+
+    return {
+        "kendall_tau_distance": discordant,
+        "kendall_tau": round(1 - 2 * discordant / pairs, 4) if pairs else 0.0,
+        "lcs_length": longest_increasing_length(common),
+        "edit_distance": edit_distance(planned_length, actual),
+    }
@@ -0,0 +1,224 @@
+import asyncio
+import secrets
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable
+
+import msgpack
+
+from app.core.config import settings
+
+# Shared across uvicorn workers (CACHE_BACKEND=redis), so keys are namespaced
+# and versioned: bump the version when a cached payload changes shape
+KEY_PREFIX = "logistic:v2:"
+
+# Deletes a lock only while it still holds the caller's token, in one step: a
+# GET then DEL could delete a lock another worker took after ours expired
+RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _encode(value):
+    # Payloads are served as JSON, so dates/times go in as ISO strings and
+    # Decimals as floats: exactly what the JSON encoder would emit
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def pack(value: Any) -> bytes:
+    return msgpack.packb(value, default=_encode, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for a Redis server, implementing the subset of the
+    redis.asyncio client that SharedCache uses (GET, SET with PX/NX and the
+    RELEASE_LOCK script). Useful for tests and single-worker deployments.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    async def get(self, name: str) -> bytes | None:
+        with self._lock:
+            entry = self._live(name)
+            return entry[1] if entry else None
+
+    async def set(self, name: str, value, px: int | None = None, nx: bool = False):
+        if isinstance(value, str):
+            value = value.encode()
+        expires_at = time.monotonic() + px / 1000 if px else None
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            self._data[name] = (expires_at, value)
+            return True
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args) -> int:
+        if script != RELEASE_LOCK:
+            raise NotImplementedError("MemoryBackend only runs RELEASE_LOCK")
+        name, token = keys_and_args
+        if isinstance(token, str):
+            token = token.encode()
+        with self._lock:
+            entry = self._live(name)
+            if entry is None or entry[1] != token:
+                return 0
+            del self._data[name]
+            return 1
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def create_client(backend: str, url: str):
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryBackend()
+    if backend == "redis":
+        try:
+            from redis import asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        return redis.from_url(url)
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend!r}")
+
+
+class _Abandoned(Exception):
+    """The request computing a key was cancelled; its waiters retry on their own."""
+
+
+class SharedCache:
+    """
+    Cache-aside over a Redis-compatible client with stampede protection: on a
+    miss only one caller computes the value. Within a worker, concurrent
+    callers await the same in-flight computation; across workers, a
+    SET NX PX lock elects the worker that computes while the others poll for
+    its result (and compute themselves if the lock holder takes too long).
+    """
+
+    def __init__(self, client, ttl: float, lock_ms: int, poll_ms: int = 20):
+        self.client = client
+        self.ttl = ttl
+        self.lock_ms = lock_ms
+        self.poll_ms = poll_ms
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.computes = 0
+        self.lock_waits = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: float | None = None):
+        if self.client is None:
+            return await compute()
+
+        key = KEY_PREFIX + key
+        while True:
+            data = await self.client.get(key)
+            if data is not None:
+                self.hits += 1
+                return unpack(data)
+            self.misses += 1
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                return await asyncio.shield(inflight)
+            except _Abandoned:
+                # Its computation ran on the cancelled request's session, so
+                # it can't be finished on its behalf: start over
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fill(key, compute, self.ttl if ttl is None else ttl)
+        except asyncio.CancelledError:
+            # Waiters get _Abandoned rather than our cancellation
+            future.set_exception(_Abandoned())
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved: there may be no other waiters to see it
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _fill(self, key: str, compute, ttl: float):
+        lock_key = key + ":lock"
+        token = secrets.token_hex(8).encode()
+        deadline = time.monotonic() + self.lock_ms / 1000
+
+        locked = await self.client.set(lock_key, token, px=self.lock_ms, nx=True)
+        while not locked:
+            # Another worker is computing this key: wait for its result
+            self.lock_waits += 1
+            await asyncio.sleep(self.poll_ms / 1000)
+            data = await self.client.get(key)
+            if data is not None:
+                return unpack(data)
+            if time.monotonic() >= deadline:
+                break
+            locked = await self.client.set(lock_key, token, px=self.lock_ms, nx=True)
+
+        try:
+            self.computes += 1
+            value = await compute()
+            await self.client.set(key, pack(value), px=int(ttl * 1000))
+            return value
+        finally:
+            if locked:
+                await self.client.eval(RELEASE_LOCK, 1, lock_key, token)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": settings.CACHE_BACKEND,
+            "hits_total": self.hits,
+            "misses_total": self.misses,
+            "computes_total": self.computes,
+            "lock_waits_total": self.lock_waits,
+        }
+
+
+shared_cache = SharedCache(
+    create_client(settings.CACHE_BACKEND, settings.REDIS_URL),
+    ttl=settings.SHARED_CACHE_TTL,
+    lock_ms=settings.SHARED_CACHE_LOCK_MS,
+)
@@ -0,0 +1,188 @@
+from typing import List, Sequence
+
+import numpy as np
+
+
+def unit_vectors(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    # Points on the unit sphere: chord length is monotonic in great-circle
+    # distance, so nearest by chord is nearest by haversine
+    lat = np.radians(lat)
+    lng = np.radians(lng)
+    cos_lat = np.cos(lat)
+
+    return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)))
+
+
+class UnitSphereKDTree:
+    """Bucketed KD-tree over 3D unit-sphere coordinates that supports deletion.
+
+    Deleted points are dropped from their leaf and the live-point counts along
+    the path to the root are decremented, so emptied subtrees are skipped.
+    """
+
+    def __init__(self, lat: Sequence[float], lng: Sequence[float], leaf_size: int = 16):
+        xyz = unit_vectors(np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64))
+        self.points = [tuple(p) for p in xyz.tolist()]
+
+        self.lo: List[tuple] = []
+        self.hi: List[tuple] = []
+        self.children: List[tuple] = []
+        self.buckets: List[list] = []
+        self.parent: List[int] = []
+        self.alive: List[int] = []
+        self.leaf_of = [0] * len(self.points)
+
+        if self.points:
+            self._build(xyz, np.arange(len(self.points)), leaf_size)
+
+    def __len__(self) -> int:
+        return self.alive[0] if self.alive else 0
+
+    def _new_node(self, xyz: np.ndarray, indices: np.ndarray, parent: int) -> int:
+        node = len(self.lo)
+        box = xyz[indices]
+        self.lo.append(tuple(box.min(axis=0).tolist()))
+        self.hi.append(tuple(box.max(axis=0).tolist()))
+        self.children.append(())
+        self.buckets.append([])
+        self.parent.append(parent)
+        self.alive.append(len(indices))
+        return node
+
+    def _build(self, xyz: np.ndarray, indices: np.ndarray, leaf_size: int) -> None:
+        stack = [(self._new_node(xyz, indices, -1), indices)]
+
+        while stack:
+            node, indices = stack.pop()
+
+            if len(indices) <= leaf_size:
+                self.buckets[node] = indices.tolist()
+                for index in self.buckets[node]:
+                    self.leaf_of[index] = node
+                continue
+
+            # Split on the widest axis at the median
+            axis = int(np.argmax(np.subtract(self.hi[node], self.lo[node])))
+            ranked = indices[np.argsort(xyz[indices, axis], kind="stable")]
+            mid = len(ranked) // 2
+
+            left = self._new_node(xyz, ranked[:mid], node)
+            right = self._new_node(xyz, ranked[mid:], node)
+            self.children[node] = (left, right)
+
+            stack.append((left, ranked[:mid]))
+            stack.append((right, ranked[mid:]))
+
+    def _box_distance(self, node: int, point: tuple) -> float:
+        total = 0.0
+        for value, lo, hi in zip(point, self.lo[node], self.hi[node]):
+            if value < lo:
+                total += (lo - value) ** 2
+            elif value > hi:
+                total += (value - hi) ** 2
+        return total
+
+    def remove(self, index: int) -> None:
+        node = self.leaf_of[index]
+        self.buckets[node].remove(index)
+
+        while node != -1:
+            self.alive[node] -= 1
+            node = self.parent[node]
+
+    def nearest(self, index: int) -> int:
+        """Closest live point to the (possibly deleted) point at ``index``."""
+        x, y, z = self.points[index]
+        best_distance = float("inf")
+        best = -1
+
+        stack = [(0.0, 0)]
+        while stack:
+            bound, node = stack.pop()
+            if bound > best_distance or not self.alive[node]:
+                continue
+
+            children = self.children[node]
+            if not children:
+                for candidate in self.buckets[node]:
+                    cx, cy, cz = self.points[candidate]
+                    distance = (cx - x) ** 2 + (cy - y) ** 2 + (cz - z) ** 2
+                    # Ties resolve to the lowest index, like argmin on the matrix
+                    if distance < best_distance or (distance == best_distance and candidate < best):
+                        best_distance = distance
+                        best = candidate
+                continue
+
+            left, right = children
+            left_bound = self._box_distance(left, (x, y, z))
+            right_bound = self._box_distance(right, (x, y, z))
+
+            # Push the farther child first so the nearer one is explored first
+            if left_bound <= right_bound:
+                stack.append((right_bound, right))
+                stack.append((left_bound, left))
+            else:
+                stack.append((left_bound, left))
+                stack.append((right_bound, right))
+
+        return best
+
+    def nearest_neighbour_order(self, start: int = 0) -> List[int]:
+        order = [start]
+        self.remove(start)
+
+        current = start
+        while len(self):
+            current = self.nearest(current)
+            self.remove(current)
+            order.append(current)
+
+        return order
+
+
+def neighbour_lists(lat: Sequence[float], lng: Sequence[float], k: int) -> List[List[int]]:
+    """Approximate ``k`` nearest other points of every point, nearest first.
+
+    Points are bucketed on a grid sized for about ``k`` points per cell, and
+    each point is ranked against its own and the eight surrounding cells, so
+    the cost is linear in the number of points rather than quadratic. Good
+    enough for local-search candidate lists, where a missed far neighbour only
+    means a move isn't tried.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    n = len(lat)
+    if n < 2:
+        return [[] for _ in range(n)]
+
+    # Equirectangular projection: routes span a few kilometres, where it ranks
+    # neighbours the same as great-circle distance
+    x = lng * np.cos(np.radians(lat.mean()))
+    y = lat
+    xy = np.column_stack((x, y))
+    area = max(np.ptp(x) * np.ptp(y), 1e-12)
+    cell = max(np.sqrt(area * k / n), 1e-9)
+
+    cx = ((x - x.min()) / cell).astype(np.int64)
+    cy = ((y - y.min()) / cell).astype(np.int64)
+    cells: dict = {}
+    for index, key in enumerate(zip(cx.tolist(), cy.tolist())):
+        cells.setdefault(key, []).append(index)
+
+    result: List[List[int]] = [[] for _ in range(n)]
+    for (i, j), members in cells.items():
+        candidates = np.array([
+            index
+            for di in (-1, 0, 1)
+            for dj in (-1, 0, 1)
+            for index in cells.get((i + di, j + dj), ())
+        ])
+        members = np.array(members)
+        distance = ((xy[members, None, :] - xy[None, candidates, :]) ** 2).sum(axis=2)
+        # The point itself ranks first (distance 0, or tied with duplicates);
+        # drop it by index rather than by rank
+        ranked = candidates[np.argsort(distance, axis=1, kind="stable")[:, :k + 1]]
+        for member, row in zip(members.tolist(), ranked.tolist()):
+            result[member] = [index for index in row if index != member][:k]
+
+    return result
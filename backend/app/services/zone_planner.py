@@ -0,0 +1,72 @@
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.compact_route import CompactRoute
+from app.services.distance_matrix import DistanceMatrix
+from app.services.route_improvement import improve_route
+
+# Most of improve_ms the zone tour may use; zone tours are tiny (tens of
+# zones), so 2-opt converges well inside this
+ZONE_TOUR_BUDGET_MS = 50
+
+
+def group_by_zone(zone_ids: Sequence[Optional[str]], indices: Sequence[int]) -> Dict[Optional[str], List[int]]:
+    zones: Dict[Optional[str], List[int]] = {}
+    for index in indices:
+        zones.setdefault(zone_ids[index], []).append(index)
+    return zones
+
+
+def sequence_zone(
+    lat: np.ndarray,
+    lng: np.ndarray,
+    members: List[int],
+    anchor: tuple,
+    improve_ms: float = 0,
+) -> List[int]:
+    # Open path through one zone, starting from the stop nearest to the anchor
+    # point (where the driver enters from)
+    matrix = DistanceMatrix(
+        np.concatenate(([anchor[0]], lat[members])),
+        np.concatenate(([anchor[1]], lng[members])),
+    )
+    order = matrix.nearest_neighbour_order(start=0)
+    if improve_ms > 0:
+        order = improve_route(order, matrix.matrix, budget_ms=improve_ms)
+
+    return [members[position - 1] for position in order[1:]]
+
+
+def zone_order(stops: CompactRoute, improve_ms: float = 0) -> List[int]:
+    """Visit order over ``stops`` (station at index 0) that finishes one zone before the next."""
+    lat, lng = stops.lat, stops.lng
+    zones = group_by_zone(stops.zone_ids, range(1, len(stops)))
+    zone_ids = list(zones)
+
+    # Small TSP over the station and the zone centroids decides the zone order
+    centroids = np.array([(lat[zones[z]].mean(), lng[zones[z]].mean()) for z in zone_ids]).reshape(-1, 2)
+    zone_matrix = DistanceMatrix(
+        np.concatenate(([lat[0]], centroids[:, 0])),
+        np.concatenate(([lng[0]], centroids[:, 1])),
+    )
+    tour = zone_matrix.nearest_neighbour_order(start=0)
+
+    # The zone tour and the stops inside the zones share improve_ms: whatever
+    # the zone tour doesn't use is split across the zones by stop count
+    started = time.perf_counter()
+    tour = improve_route(tour, zone_matrix.matrix, budget_ms=min(improve_ms, ZONE_TOUR_BUDGET_MS))
+    remaining_ms = max(0.0, improve_ms - (time.perf_counter() - started) * 1000)
+
+    # Each zone is entered from the stop the previous one actually ended on,
+    # so zones are sequenced one after another rather than independently
+    order = [0]
+    for position in tour[1:]:
+        members = zones[zone_ids[position - 1]]
+        exit_stop = order[-1]
+        order.extend(
+            sequence_zone(lat, lng, members, (lat[exit_stop], lng[exit_stop]), remaining_ms * len(members) / (len(stops) - 1))
+        )
+
+    return order
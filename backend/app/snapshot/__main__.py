@@ -0,0 +1,62 @@
+"""
+Write columnar Parquet snapshots of stops and routes for a date range.
+
+Usage (from backend/):
+    python -m app.snapshot --date-from 2018-07-01 --date-to 2018-07-31 --out snapshots/
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.ingest.precompute import session_factory
+from app.snapshot.parquet import ROW_GROUP_ROWS, ParquetChunks, SnapshotTable, snapshot_filename, snapshot_stmt
+
+
+def write_snapshot(db, table: SnapshotTable, path: str, args) -> int:
+    stmt = snapshot_stmt(table, args.station_code, args.date_from, args.date_to)
+    # Server-side cursor: one row group's worth of rows in memory at a time
+    result = db.execute(stmt.execution_options(yield_per=args.row_group_size))
+
+    with open(path, "wb") as f:
+        writer = ParquetChunks(table, sink=f)
+        for rows in result.partitions():
+            writer.write(rows)
+        writer.close()
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--date-from", type=date.fromisoformat, help="first route date (YYYY-MM-DD)")
+    parser.add_argument("--date-to", type=date.fromisoformat, help="last route date (YYYY-MM-DD)")
+    parser.add_argument("--station-code")
+    parser.add_argument("--table", choices=[table.value for table in SnapshotTable], action="append",
+                        help="table to write (repeatable); defaults to all")
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_ROWS)
+    parser.add_argument("--dsn", help="libpq connection string; defaults to the POSTGRES_* settings")
+    args = parser.parse_args()
+
+    tables = [SnapshotTable(table) for table in args.table] if args.table else list(SnapshotTable)
+    os.makedirs(args.out, exist_ok=True)
+
+    db = session_factory(args.dsn)()
+    try:
+        for table in tables:
+            path = os.path.join(args.out, snapshot_filename(table, args.date_from, args.date_to))
+            started = time.perf_counter()
+            rows = write_snapshot(db, table, path, args)
+            print(f"✅ {path}: {rows} rows, {os.path.getsize(path) / 1e6:.1f} MB in {time.perf_counter() - started:.2f}s")
+    except (OSError, RuntimeError, SQLAlchemyError) as exc:
+        print(f"❌ Snapshot failed: {exc}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
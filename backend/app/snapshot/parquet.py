@@ -0,0 +1,147 @@
+from enum import Enum
+from typing import List, Sequence
+
+from app.repositories.route_repository import snapshot_routes_stmt, snapshot_stops_stmt
+from app.services.route_comparison import METRIC_FIELDS
+
+# Rows per Parquet row group, which is also the number of rows fetched from
+# the database cursor at a time
+ROW_GROUP_ROWS = 100_000
+
+MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Integer metric columns; the rest are doubles
+INTEGER_METRICS = {
+    "order_matched_stops",
+    "prefix_match_count",
+    "total_stops",
+    "kendall_tau_distance",
+    "lcs_length",
+    "edit_distance",
+}
+
+
+class SnapshotTable(str, Enum):
+    STOPS = "stops"
+    ROUTES = "routes"
+
+
+def snapshot_stmt(table: SnapshotTable, station_code=None, date_from=None, date_to=None):
+    stmt = snapshot_stops_stmt if table == SnapshotTable.STOPS else snapshot_routes_stmt
+    return stmt(station_code=station_code, date_from=date_from, date_to=date_to)
+
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Snapshot export requires the 'pyarrow' package") from exc
+    return pa, pq
+
+
+def arrow_schema(table: SnapshotTable):
+    # Repeated strings are dictionary-encoded, coordinates are float32 (about
+    # 1 m of precision at these latitudes) and sequences are int32
+    pa, _ = require_pyarrow()
+    text = pa.dictionary(pa.int32(), pa.string())
+
+    if table == SnapshotTable.STOPS:
+        return pa.schema([
+            ("route_id", text),
+            ("date", pa.date32()),
+            ("station_code", text),
+            ("stop_code", text),
+            ("lat", pa.float32()),
+            ("lng", pa.float32()),
+            ("type", text),
+            ("zone_id", text),
+            ("planned_sequence", pa.int32()),
+            ("actual_sequence", pa.int32()),
+        ])
+
+    return pa.schema([
+        ("route_id", pa.string()),
+        ("date", pa.date32()),
+        ("station_code", text),
+        ("departure_time_utc", pa.time32("s")),
+        ("executor_capacity_cm3", pa.float64()),
+        ("route_score", text),
+        *((field, pa.int32() if field in INTEGER_METRICS else pa.float64()) for field in METRIC_FIELDS),
+    ])
+
+
+def record_batch(schema, rows: Sequence):
+    # `rows` are SQLAlchemy rows whose column labels match the schema names
+    pa, _ = require_pyarrow()
+    columns = dict(zip(rows[0]._fields, zip(*rows)))
+
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    # Write-only file object that hands back whatever was written since the
+    # last drain(), so a Parquet file can be streamed as it's produced
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetChunks:
+    """
+    Incremental Parquet writer: each write() adds one row group and returns
+    the bytes produced so far, close() returns the footer.
+    """
+
+    def __init__(self, table: SnapshotTable, sink=None):
+        _, pq = require_pyarrow()
+        self.schema = arrow_schema(table)
+        self._sink = sink if sink is not None else _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+        self.rows = 0
+
+    def _drain(self) -> bytes:
+        return self._sink.drain() if isinstance(self._sink, _ChunkSink) else b""
+
+    def write(self, rows: Sequence) -> bytes:
+        if rows:
+            batch = record_batch(self.schema, rows)
+            self._writer.write_batch(batch, row_group_size=len(rows))
+            self.rows += len(rows)
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+
+def snapshot_filename(table: SnapshotTable, date_from, date_to) -> str:
+    return f"{table.value}_{date_from or 'start'}_{date_to or 'end'}.parquet"
@@ -0,0 +1,6 @@
+import os
+
+# app.core.config requires the database credentials; unit tests never connect
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("POSTGRES_DB", "test")
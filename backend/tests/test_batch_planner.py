@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.services.batch_planner import plan_routes, shutdown_executor
+from app.services.compact_route import CompactRoute
+from app.services.router_planner import PlannerMode
+
+
+def route(route_id, n, seed, station=True):
+    rng = np.random.default_rng(seed)
+    rows = [
+        (f"S{i}", 47.6 + rng.random() * 0.1, -122.3 + rng.random() * 0.1, "Dropoff", f"Z{i % 3}")
+        for i in range(n)
+    ]
+    if station and rows:
+        rows[n // 2] = (rows[n // 2][0], rows[n // 2][1], rows[n // 2][2], "Station", None)
+    return CompactRoute.from_rows(route_id, rows)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def executor():
+    yield
+    shutdown_executor()
+
+
+@pytest.mark.parametrize("mode", list(PlannerMode))
+def test_failed_routes_do_not_stop_the_batch(mode):
+    routes = {
+        "R1": route("R1", 30, 1),
+        "no_station": route("no_station", 10, 2, station=False),
+        "R2": route("R2", 40, 3),
+        "no_stops": route("no_stops", 0, 4),
+    }
+
+    planned, failed = plan_routes(routes, mode=mode, improve_ms=10)
+
+    assert set(planned) == {"R1", "R2"}
+    assert set(failed) == {"no_station", "no_stops"}
+    assert all("station" in error.lower() for error in failed.values())
+    for route_id, sequence in planned.items():
+        stops = routes[route_id]
+        assert sorted(code for code, _ in sequence) == sorted(stops.stop_codes)
+        assert [position for _, position in sequence] == list(range(len(stops)))
+        # The station is visited first
+        assert sequence[0][0] == stops.stop_codes[len(stops) // 2]
+
+
+def test_empty_batch():
+    assert plan_routes({}) == ({}, {})
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import TTLCache, cached, current_route_version
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_set_and_expiry(clock):
+    cache = TTLCache("test", maxsize=10, ttl=5)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    clock[0] += 5
+    assert cache.get("a") is None
+    assert cache.get("a", "missing") == "missing"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lru_eviction(clock):
+    cache = TTLCache("test", maxsize=2, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_version_mismatch_is_a_miss(clock):
+    cache = TTLCache("test", maxsize=10, ttl=5)
+    cache.set("a", 1, version=("v1",))
+    assert cache.get("a") == 1
+    assert cache.get("a", version=("v1",)) == 1
+    assert cache.get("a", version=("v2",)) is None
+    # The stale entry is dropped
+    assert cache.get("a") is None
+
+
+def test_invalidate_and_clear(clock):
+    cache = TTLCache("test", maxsize=10, ttl=5)
+    cache.set(("r1",), 1)
+    cache.set(("r2",), 2)
+    cache.invalidate("r1")
+    assert cache.get(("r1",)) is None
+    cache.clear()
+    assert cache.snapshot()["size"] == 0
+
+
+def test_cached_sync():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    calls = []
+
+    @cached(cache)
+    def load(db, route_id):
+        calls.append(route_id)
+        return None if route_id == "missing" else {"route_id": route_id}
+
+    assert load(object(), "r1") == {"route_id": "r1"}
+    assert load(object(), "r1") == {"route_id": "r1"}
+    # None is not cached
+    assert load(object(), "missing") is None
+    assert load(object(), "missing") is None
+    assert calls == ["r1", "missing", "missing"]
+
+
+def test_cached_reloads_on_new_route_version():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    calls = []
+
+    @cached(cache)
+    async def load(db, route_id):
+        calls.append(route_id)
+        return {"route_id": route_id, "call": len(calls)}
+
+    async def request(route_id, version):
+        current_route_version.set((route_id, version))
+        return await load(object(), route_id)
+
+    async def main():
+        assert (await request("r1", "v1"))["call"] == 1
+        assert (await request("r1", "v1"))["call"] == 1
+        assert (await request("r1", "v2"))["call"] == 2
+        # The version only applies to the route it was read for
+        assert (await request("r2", "v9"))["call"] == 3
+        assert (await load(object(), "r1"))["call"] == 2
+
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+import json
+from datetime import date, time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.etag import route_etag
+from app.api.export import csv_chunk, csv_header, ndjson_chunk
+from app.db.session import get_async_db
+
+
+def comparison():
+    route = SimpleNamespace(
+        route_id="RouteID_1",
+        station_code="DLA3",
+        date_YYYY_MM_DD=date(2018, 7, 27),
+        departure_time_utc=time(15, 58, 25),
+        executor_capacity_cm3=Decimal("3313071.00"),
+        route_score="High",
+    )
+    return {
+        "route": route,
+        "planned": {
+            "stop_code": ["ST", "AA", "BB", "CC"],
+            "sequence": [0, 1, 2, 3],
+            "lat": [34.1, 34.11, 34.12, 34.13],
+            "lng": [-118.2, -118.21, -118.22, -118.23],
+            "zone_id": [None, "A-1.1A", "A-1.1A", "A-1.2B"],
+            "type": ["Station", "Dropoff", "Dropoff", "Dropoff"],
+        },
+        "actual": {
+            "stop_code": ["ST", "BB", "AA", "CC"],
+            "sequence": [0, 1, 2, 3],
+            "lat": [34.1, 34.12, 34.11, 34.13],
+            "lng": [-118.2, -118.22, -118.21, -118.23],
+            "zone_id": [None, "A-1.1A", "A-1.1A", "A-1.2B"],
+            "type": ["Station", "Dropoff", "Dropoff", "Dropoff"],
+        },
+        "metrics": None,
+        "metrics_fresh": False,
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def get_route_with_sequences(db, route_id):
+        return comparison() if route_id == "RouteID_1" else None
+
+    monkeypatch.setattr(routes.async_repo, "get_route_with_sequences", get_route_with_sequences)
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_async_db] = lambda: None
+    app.dependency_overrides[route_etag] = lambda route_id: f'"{route_id}"'
+    return TestClient(app)
+
+
+def test_ndjson_line_matches_comparison(client):
+    response = client.get("/routes/RouteID_1/comparison")
+    assert response.status_code == 200
+
+    lines = ndjson_chunk([comparison()]).splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == response.json()
+
+    body = response.json()
+    assert [stop["stop_code"] for stop in body["actual_route"]] == ["ST", "BB", "AA", "CC"]
+    assert body["metrics"]["order_matched_stops"] == 2
+
+
+def test_csv_row_matches_header(client):
+    header = csv_header().decode().strip().split(",")
+    row = csv_chunk([comparison()]).decode().strip().split(",")
+    assert len(row) == len(header)
+    assert dict(zip(header, row))["planned_stop_codes"] == "ST AA BB CC"
+
+
+def test_unknown_route(client):
+    assert client.get("/routes/nope/comparison").status_code == 404
@@ -0,0 +1,30 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("key", [
+    (date(2018, 7, 27), "RouteID_00143bdd-0a6b-49ec-bb35-36593d303e77"),
+    (None, "RouteID_0001"),
+])
+def test_cursor_round_trip(key):
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+def test_no_cursor():
+    assert encode_cursor(None) is None
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "bm90IGpzb24", "WzFd", "WyIyMDE4LTEzLTAxIiwiUiJd"])
+def test_invalid_cursor(cursor):
+    # "not json", "[1]", ["2018-13-01","R"]
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
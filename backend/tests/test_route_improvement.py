@@ -0,0 +1,103 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from app.services.distance_matrix import DistanceMatrix, haversine_path
+from app.services.route_improvement import (
+    DENSE_LIMIT,
+    NeighbourDistances,
+    improve_route,
+    improve_tour,
+    or_opt,
+    or_opt_neighbours,
+    two_opt,
+    two_opt_neighbours,
+)
+
+
+def random_stops(n, seed):
+    rng = np.random.default_rng(seed)
+    return 47.6 + rng.random(n) * 0.1, -122.3 + rng.random(n) * 0.1
+
+
+def random_order(n, seed):
+    # A shuffled tour that starts at stop 0, the station
+    rest = list(range(1, n))
+    random.Random(seed).shuffle(rest)
+    return [0] + rest
+
+
+def path_length(order, lat, lng):
+    return float(haversine_path(lat[order], lng[order]).sum())
+
+
+def assert_valid_tour(tour, order):
+    assert tour[0] == order[0]
+    assert sorted(tour) == sorted(order)
+
+
+@pytest.mark.parametrize("stage", [two_opt, or_opt])
+@pytest.mark.parametrize("seed", range(5))
+def test_dense_stage_keeps_permutation(stage, seed):
+    lat, lng = random_stops(60, seed)
+    matrix = DistanceMatrix(lat, lng)
+    dist = matrix.matrix.tolist()
+    tour = random_order(60, seed)
+    order = list(tour)
+
+    length = matrix.path_length(tour)
+    deadline = time.perf_counter() + 10
+    while stage(tour, dist, deadline):
+        assert_valid_tour(tour, order)
+        assert matrix.path_length(tour) < length
+        length = matrix.path_length(tour)
+
+
+@pytest.mark.parametrize("stage", [two_opt_neighbours, or_opt_neighbours])
+@pytest.mark.parametrize("seed", range(5))
+def test_neighbour_stage_keeps_permutation(stage, seed):
+    lat, lng = random_stops(300, seed)
+    dist = NeighbourDistances(lat, lng)
+    tour = random_order(300, seed)
+    order = list(tour)
+    position = [0] * len(tour)
+    for index, stop in enumerate(tour):
+        position[stop] = index
+
+    length = path_length(tour, lat, lng)
+    deadline = time.perf_counter() + 10
+    while stage(tour, position, dist, deadline):
+        assert_valid_tour(tour, order)
+        assert all(position[stop] == index for index, stop in enumerate(tour))
+        assert path_length(tour, lat, lng) < length
+        length = path_length(tour, lat, lng)
+
+
+def test_neighbour_distances_match_haversine():
+    lat, lng = random_stops(50, 0)
+    matrix = DistanceMatrix(lat, lng).matrix
+    dist = NeighbourDistances(lat, lng)
+    for a in range(50):
+        assert dist.distance(a, None) == 0.0
+        for b in range(50):
+            assert dist.distance(a, b) == pytest.approx(matrix[a, b], abs=1e-6)
+
+
+@pytest.mark.parametrize("n", [50, DENSE_LIMIT + 200])
+def test_improve_tour(n):
+    lat, lng = random_stops(n, n)
+    order = random_order(n, n)
+
+    tour = improve_tour(order, lat, lng, budget_ms=300)
+
+    assert_valid_tour(tour, order)
+    assert path_length(tour, lat, lng) < path_length(order, lat, lng)
+
+
+def test_improve_tour_without_budget():
+    lat, lng = random_stops(20, 0)
+    order = random_order(20, 0)
+    assert improve_tour(order, lat, lng, budget_ms=0) == order
+    assert improve_route(order, DistanceMatrix(lat, lng).matrix, budget_ms=0) == order
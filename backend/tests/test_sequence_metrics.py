@@ -0,0 +1,82 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from app.services.sequence_metrics import (
+    count_inversions,
+    edit_distance,
+    intern_positions,
+    longest_increasing_length,
+    sequence_similarity,
+)
+
+
+def brute_inversions(values):
+    return sum(1 for a, b in combinations(values, 2) if a > b)
+
+
+def brute_lcs(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            table[i + 1][j + 1] = table[i][j] + 1 if x == y else max(table[i][j + 1], table[i + 1][j])
+    return table[-1][-1]
+
+
+def brute_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def random_sequences(rng):
+    planned = [f"S{i}" for i in range(rng.randint(0, 40))]
+    actual = [code for code in planned if rng.random() < 0.9]
+    rng.shuffle(actual)
+    # Stops delivered without being planned
+    actual += [f"X{i}" for i in range(rng.randint(0, 3))]
+    rng.shuffle(actual)
+    return planned, actual
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_metrics_match_brute_force(seed):
+    rng = random.Random(seed)
+    planned, actual = random_sequences(rng)
+    planned_length, positions = intern_positions(planned, actual)
+    common = [position for position in positions if position < planned_length]
+
+    assert count_inversions(common) == brute_inversions(common)
+    assert longest_increasing_length(common) == brute_lcs(planned, actual)
+    assert edit_distance(planned_length, positions) == brute_levenshtein(planned, actual)
+
+
+def test_sequence_similarity():
+    assert sequence_similarity(["A", "B", "C", "D"], ["A", "B", "C", "D"]) == {
+        "kendall_tau_distance": 0,
+        "kendall_tau": 1.0,
+        "lcs_length": 4,
+        "edit_distance": 0,
+    }
+    assert sequence_similarity(["A", "B", "C", "D"], ["D", "C", "B", "A"]) == {
+        "kendall_tau_distance": 6,
+        "kendall_tau": -1.0,
+        "lcs_length": 1,
+        "edit_distance": 4,
+    }
+
+
+def test_sequence_similarity_empty():
+    assert sequence_similarity([], []) == {
+        "kendall_tau_distance": 0,
+        "kendall_tau": 0.0,
+        "lcs_length": 0,
+        "edit_distance": 0,
+    }
+    assert sequence_similarity(["A", "B"], [])["edit_distance"] == 2
+    assert sequence_similarity([], ["A", "B"])["edit_distance"] == 2
@@ -0,0 +1,206 @@
+import asyncio
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+
+from app.services.shared_cache import KEY_PREFIX, RELEASE_LOCK, MemoryBackend, SharedCache, pack, unpack
+
+
+def counting(value, started=None, release=None):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        if started is not None:
+            started.set()
+        if release is not None:
+            await release.wait()
+        return value
+
+    return compute, calls
+
+
+def test_pack_round_trip():
+    value = {
+        "route_id": "RouteID_1",
+        "date": date(2018, 7, 27),
+        "departure": time(15, 58, 25),
+        "at": datetime(2018, 7, 27, 15, 58, 25),
+        "capacity": Decimal("3313071.50"),
+        "stops": [{"lat": 34.1, "zone_id": None, "count": 3}],
+    }
+    assert unpack(pack(value)) == {
+        "route_id": "RouteID_1",
+        "date": "2018-07-27",
+        "departure": "15:58:25",
+        "at": "2018-07-27T15:58:25",
+        "capacity": 3313071.5,
+        "stops": [{"lat": 34.1, "zone_id": None, "count": 3}],
+    }
+    with pytest.raises(TypeError):
+        pack({"value": object()})
+
+
+def test_hit_after_fill():
+    async def main():
+        cache = SharedCache(MemoryBackend(), ttl=60, lock_ms=1000)
+        compute, calls = counting({"n": 1})
+        assert await cache.get_or_compute("k", compute) == {"n": 1}
+        assert await cache.get_or_compute("k", compute) == {"n": 1}
+        assert len(calls) == 1
+        assert (cache.hits, cache.computes) == (1, 1)
+
+    asyncio.run(main())
+
+
+def test_without_backend_always_computes():
+    async def main():
+        cache = SharedCache(None, ttl=60, lock_ms=1000)
+        compute, calls = counting(1)
+        await cache.get_or_compute("k", compute)
+        await cache.get_or_compute("k", compute)
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_one_inflight_computation_per_key():
+    async def main():
+        cache = SharedCache(MemoryBackend(), ttl=60, lock_ms=1000)
+        release = asyncio.Event()
+        compute, calls = counting("value", release=release)
+
+        tasks = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(10)]
+        await asyncio.sleep(0.01)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ["value"] * 10
+        assert len(calls) == 1
+        assert cache.computes == 1
+
+    asyncio.run(main())
+
+
+def test_failure_reaches_waiters_and_is_not_cached():
+    async def main():
+        cache = SharedCache(MemoryBackend(), ttl=60, lock_ms=1000)
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError("boom")
+
+        tasks = [asyncio.create_task(cache.get_or_compute("k", failing)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        compute, calls = counting("ok")
+        assert await cache.get_or_compute("k", compute) == "ok"
+        assert len(calls) == 1
+
+    asyncio.run(main())
+
+
+def test_other_worker_waits_for_the_lock_holder():
+    async def main():
+        backend = MemoryBackend()
+        first = SharedCache(backend, ttl=60, lock_ms=1000, poll_ms=5)
+        second = SharedCache(backend, ttl=60, lock_ms=1000, poll_ms=5)
+        started, release = asyncio.Event(), asyncio.Event()
+        compute_first, calls_first = counting("from first", started, release)
+        compute_second, calls_second = counting("from second")
+
+        task_first = asyncio.create_task(first.get_or_compute("k", compute_first))
+        await started.wait()
+        task_second = asyncio.create_task(second.get_or_compute("k", compute_second))
+        await asyncio.sleep(0.03)
+        release.set()
+
+        assert await task_first == "from first"
+        assert await task_second == "from first"
+        assert (len(calls_first), len(calls_second)) == (1, 0)
+        assert second.lock_waits > 0
+        assert await backend.get(KEY_PREFIX + "k:lock") is None
+
+    asyncio.run(main())
+
+
+def test_lock_wait_gives_up_after_lock_ms():
+    async def main():
+        backend = MemoryBackend()
+        first = SharedCache(backend, ttl=60, lock_ms=30, poll_ms=5)
+        second = SharedCache(backend, ttl=60, lock_ms=30, poll_ms=5)
+        started, release = asyncio.Event(), asyncio.Event()
+        compute_first, _ = counting("from first", started, release)
+        compute_second, calls_second = counting("from second")
+
+        task_first = asyncio.create_task(first.get_or_compute("k", compute_first))
+        await started.wait()
+        # The first worker is stuck: the second computes for itself
+        assert await second.get_or_compute("k", compute_second) == "from second"
+        assert len(calls_second) == 1
+
+        release.set()
+        assert await task_first == "from first"
+
+    asyncio.run(main())
+
+
+def test_waiters_retry_when_the_filler_is_cancelled():
+    async def main():
+        cache = SharedCache(MemoryBackend(), ttl=60, lock_ms=1000)
+        started = asyncio.Event()
+        never = asyncio.Event()
+        compute_owner, _ = counting("owner", started, never)
+        compute_waiter, calls_waiter = counting("waiter")
+
+        owner = asyncio.create_task(cache.get_or_compute("k", compute_owner))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_compute("k", compute_waiter))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert await waiter == "waiter"
+        assert len(calls_waiter) == 1
+        # The cancelled owner released its lock
+        assert await cache.client.get(KEY_PREFIX + "k:lock") is None
+
+    asyncio.run(main())
+
+
+def test_release_lock_only_deletes_own_token():
+    async def main():
+        backend = MemoryBackend()
+        await backend.set("lock", b"mine", px=1000, nx=True)
+        assert await backend.set("lock", b"theirs", px=1000, nx=True) is None
+
+        assert await backend.eval(RELEASE_LOCK, 1, "lock", b"theirs") == 0
+        assert await backend.get("lock") == b"mine"
+        assert await backend.eval(RELEASE_LOCK, 1, "lock", "mine") == 1
+        assert await backend.get("lock") is None
+        assert await backend.eval(RELEASE_LOCK, 1, "lock", b"mine") == 0
+
+    asyncio.run(main())
+
+
+def test_expired_lock_taken_over_is_not_released():
+    async def main():
+        backend = MemoryBackend()
+        cache = SharedCache(backend, ttl=60, lock_ms=20)
+        lock_key = KEY_PREFIX + "k:lock"
+
+        async def slow():
+            # Outlive our lock, then let another worker take the key
+            await asyncio.sleep(0.05)
+            assert await backend.set(lock_key, b"other", px=1000, nx=True)
+            return "value"
+
+        assert await cache.get_or_compute("k", slow) == "value"
+        assert await backend.get(lock_key) == b"other"
+
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+
+from app.ingest.sources import iter_json_array
+
+ROUTES = [
+    {"RouteID_1": {"station_code": "DLA3", "stops": {"AA": {"lat": 34.1, "lng": -118.2}}}},
+    {"RouteID_2": {"station_code": "DLA3", "note": "commas, [brackets] and \"quotes\""}},
+    [],
+    "plain",
+    12.5,
+    None,
+]
+
+
+def parse(text, chunk_size):
+    return list(iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_elements_across_chunk_boundaries(chunk_size, indent):
+    text = json.dumps(ROUTES, indent=indent)
+    assert parse(text, chunk_size) == ROUTES
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 20])
+@pytest.mark.parametrize("text", ["[]", " [ ] ", "\n[\n]\n", "[1]", " [ 1 , 2 ] "])
+def test_whitespace_and_empty_arrays(text, chunk_size):
+    assert parse(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1 << 20])
+@pytest.mark.parametrize("text", [
+    "",
+    "{}",
+    "[",
+    "[1",
+    "[1,",
+    "[1 2]",
+    "[1,,2]",
+    "[1,]",
+    "[,1]",
+    "[,]",
+    '["a" "b"]',
+    "[{} {}]",
+])
+def test_malformed_arrays(text, chunk_size):
+    with pytest.raises(ValueError):
+        parse(text, chunk_size)
+
+
+def test_element_size_limit(monkeypatch):
+    monkeypatch.setattr("app.ingest.sources.MAX_ELEMENT_SIZE", 16)
+    assert parse('[{"a": 1}]', 4) == [{"a": 1}]
+    with pytest.raises(ValueError):
+        parse('[{"a": "' + "x" * 64 + '"}]', 4)
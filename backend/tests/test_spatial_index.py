@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.services.distance_matrix import DistanceMatrix
+from app.services.spatial_index import UnitSphereKDTree, neighbour_lists
+
+
+def random_stops(n, seed):
+    rng = np.random.default_rng(seed)
+    return 47.6 + rng.random(n) * 0.1, -122.3 + rng.random(n) * 0.1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kdtree_nearest_neighbour_order_matches_matrix(seed):
+    lat, lng = random_stops(300, seed)
+    expected = DistanceMatrix(lat, lng).nearest_neighbour_order(start=seed)
+    assert UnitSphereKDTree(lat, lng, leaf_size=4).nearest_neighbour_order(start=seed) == expected
+
+
+def test_kdtree_nearest_skips_removed():
+    lat, lng = [0.0, 0.0, 0.0], [0.0, 0.001, 0.002]
+    tree = UnitSphereKDTree(lat, lng)
+    tree.remove(0)
+    assert tree.nearest(0) == 1
+    tree.remove(1)
+    assert tree.nearest(0) == 2
+    assert len(tree) == 1
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_neighbour_lists_against_brute_force(seed):
+    k = 8
+    lat, lng = random_stops(500, seed)
+    matrix = DistanceMatrix(lat, lng).matrix
+    lists = neighbour_lists(lat, lng, k)
+
+    found = 0
+    for index, neighbours in enumerate(lists):
+        assert index not in neighbours
+        assert len(set(neighbours)) == len(neighbours) <= k
+        # Nearest first, up to the projection's error (metres)
+        assert np.all(np.diff(matrix[index, neighbours]) >= -1e-3)
+        found += len(set(neighbours) & set(np.argsort(matrix[index])[1:k + 1].tolist()))
+
+    assert found / (k * len(lists)) > 0.95
+
+
+def test_neighbour_lists_small_inputs():
+    assert neighbour_lists([], [], 5) == []
+    assert neighbour_lists([1.0], [2.0], 5) == [[]]
+    assert neighbour_lists([1.0, 1.0, 1.0], [2.0, 2.0, 2.0], 5) == [[1, 2], [0, 2], [0, 1]]
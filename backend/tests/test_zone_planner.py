@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.compact_route import CompactRoute
+from app.services.router_planner import PlannerMode, RoutePlanner
+from app.services.zone_planner import zone_order
+
+
+def zoned_route(n, seed, zones=6):
+    rng = np.random.default_rng(seed)
+    rows = [("ST", 47.65, -122.35, "Station", None)]
+    for i in range(1, n):
+        zone = int(rng.integers(zones))
+        # Zones are clusters a few hundred metres across
+        rows.append((
+            f"S{i}",
+            47.6 + zone * 0.01 + rng.random() * 0.003,
+            -122.3 + rng.random() * 0.003,
+            "Dropoff",
+            None if zone == 0 else f"Z{zone}",
+        ))
+    return CompactRoute.from_rows("R", rows)
+
+
+@pytest.mark.parametrize("improve_ms", [0, 20])
+@pytest.mark.parametrize("seed", range(3))
+def test_zone_order_visits_every_stop_once(seed, improve_ms):
+    stops = zoned_route(120, seed)
+    order = zone_order(stops, improve_ms=improve_ms)
+
+    assert order[0] == 0
+    assert sorted(order) == list(range(len(stops)))
+
+    # Each zone is finished before the next one starts
+    zones = [stops.zone_ids[index] for index in order[1:]]
+    runs = [zone for index, zone in enumerate(zones) if index == 0 or zone != zones[index - 1]]
+    assert len(runs) == len(set(runs))
+
+
+def test_zone_mode_plans_from_the_station():
+    stops = zoned_route(80, 0)
+    # Shuffle the station away from index 0
+    rows = list(zip(stops.stop_codes, stops.lat, stops.lng, stops.types, stops.zone_ids))
+    rows = rows[40:] + rows[:40]
+    planned = RoutePlanner(None, CompactRoute.from_rows("R", rows), mode=PlannerMode.ZONE).generate_planned_route()
+
+    assert planned[0]["stop_code"] == "ST"
+    assert [stop["planned_sequence"] for stop in planned] == list(range(len(rows)))
+    assert sorted(stop["stop_code"] for stop in planned) == sorted(stops.stop_codes)
+
+
+def test_zone_order_station_only():
+    stops = zoned_route(1, 0)
+    assert zone_order(stops) == [0]
@@ -1,14 +1,28 @@
 import type { Route } from "../data/mockRoutes";
 import { API_BASE } from "../config/api";
 
-export async function fetchRoutes(skip = 0, limit = 25): Promise<Route[]> {
-  const res = await fetch(`${API_BASE}/routes?skip=${skip}&limit=${limit}`);
+export interface RoutesPage {
+  routes: Route[];
+  nextCursor: string | null;
+}
+
+export async function fetchRoutes(
+  cursor: string | null = null,
+  limit = 25,
+): Promise<RoutesPage> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+
+  const res = await fetch(`${API_BASE}/routes?${params}`);
 
   if (!res.ok) {
     throw new Error("Failed to fetch routes");
   }
 
-  return res.json(); // await the JSON parsing
+  return {
+    routes: await res.json(),
+    nextCursor: res.headers.get("X-Next-Cursor"),
+  };
 }
 
 export async function fetchRouteStats(): Promise<{
@@ -51,6 +51,8 @@ export default function MainApp({
   const [routeMetrics, setRouteMetrics] = useState<RouteMetrics | null>(null);
   const [page, setPage] = useState(0);
   const [totalPages, setTotalPages] = useState(0);
+  // cursors[n] is the keyset cursor that loads page n (page 0 needs none)
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
 
   // 🔑 LOGIN / LOGOUT HANDLERS
   const handleLoginSuccess = (username: string) => {
@@ -103,9 +105,17 @@ export default function MainApp({
 
     setLoading(true);
     try {
-      const data = await fetchRoutes(pageNum * PAGE_SIZE, PAGE_SIZE);
+      const { routes: data, nextCursor } = await fetchRoutes(
+        cursors[pageNum] ?? null,
+        PAGE_SIZE,
+      );
       setRoutes(data);
       setPage(pageNum);
+      setCursors((prev) => {
+        const next = prev.slice(0, pageNum + 1);
+        next[pageNum + 1] = nextCursor;
+        return next;
+      });
 
       if (data.length > 0) {
         handleRouteSelect(data[0].route_id);